@@ -972,6 +972,7 @@ Singleton {
 
         adapter: JsonAdapter {
             property string position: "bottom"
+            property int blurRadius: 64
         }
     }
 
@@ -8,6 +8,7 @@ Item {
     property string source: ""
     property real radius: 0
     property bool tintEnabled: false
+    readonly property alias status: rawImage.status
     
     // Subset of colors for optimization (approx 25 colors vs 98)
     // Copied from Wallpaper.qml to ensure consistency
@@ -40,7 +40,21 @@ WlSessionLockSurface {
             return GlobalStates.wallpaperManager.getLockscreenFramePath(GlobalStates.wallpaperManager.currentWallpaper);
         }
 
-        source: lockscreenFramePath ? "file://" + lockscreenFramePath : ""
+        // Variante pre-renderada al tamaño de esta pantalla; si aún no existe se usa el frame completo
+        property string displayFramePath: {
+            if (!GlobalStates.wallpaperManager)
+                return "";
+            return GlobalStates.wallpaperManager.getLockscreenFramePath(GlobalStates.wallpaperManager.currentWallpaper, root.screen, false);
+        }
+        property bool displayVariantFailed: false
+        onDisplayFramePathChanged: displayVariantFailed = false
+        onStatusChanged: {
+            if (status === Image.Error && !displayVariantFailed && displayFramePath !== lockscreenFramePath)
+                displayVariantFailed = true;
+        }
+
+        property string activeFramePath: displayFramePath && !displayVariantFailed ? displayFramePath : lockscreenFramePath
+        source: activeFramePath ? "file://" + activeFramePath : ""
 
         // Animación de opacidad (visibilidad)
         opacity: startAnim ? 1 : 0
@@ -54,12 +68,39 @@ WlSessionLockSurface {
             }
         }
 
-        // Efecto de Blur y Zoom mediante capa
-        layer.enabled: true
+        // Variante pre-desenfocada: cuando está lista sustituye al blur en vivo
+        TintedWallpaper {
+            id: blurredBackground
+            anchors.fill: parent
+            radius: 0
+            tintEnabled: wallpaperBackground.tintEnabled
+
+            property string blurredFramePath: {
+                if (!GlobalStates.wallpaperManager)
+                    return "";
+                return GlobalStates.wallpaperManager.getLockscreenFramePath(GlobalStates.wallpaperManager.currentWallpaper, root.screen, true);
+            }
+            readonly property bool ready: status === Image.Ready
+
+            source: blurredFramePath ? "file://" + blurredFramePath : ""
+            opacity: startAnim && ready ? 1 : 0
+            visible: ready
+
+            Behavior on opacity {
+                enabled: Config.animDuration > 0
+                NumberAnimation {
+                    duration: Config.animDuration * 2
+                    easing.type: Easing.OutQuint
+                }
+            }
+        }
+
+        // Efecto de Blur y Zoom mediante capa (solo si no hay variante pre-desenfocada)
+        layer.enabled: !blurredBackground.ready
         layer.effect: MultiEffect {
             blurEnabled: true
             blur: startAnim ? 1 : 0
-            blurMax: 64
+            blurMax: Config.lockscreen.blurRadius
         }
 
         // Zoom animation
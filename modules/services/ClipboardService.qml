@@ -20,6 +20,8 @@ QtObject {
     readonly property string checkScriptPath: Qt.resolvedUrl("../../scripts/clipboard_check.sh").toString().replace("file://", "")
     readonly property string watchScriptPath: Qt.resolvedUrl("../../scripts/clipboard_watch.sh").toString().replace("file://", "")
     readonly property string linkPreviewScriptPath: Qt.resolvedUrl("../../scripts/link_preview.py").toString().replace("file://", "")
+    readonly property string linkPreviewCachePath: Quickshell.cachePath("link_previews.db")
+    readonly property string linkPreviewMediaPath: Quickshell.cachePath("link_preview_media")
 
     property bool _initialized: false
 
@@ -98,6 +100,8 @@ QtObject {
                 root._initialized = true;
                 ensureBinaryDataDir();
                 Qt.callLater(root.list);
+                // Up front, so URLs copied from now on can be prefetched
+                linkPreviewProcess.running = true;
             } else {
                 console.warn("ClipboardService: Failed to initialize database (Exit code: " + code + ")");
             }
@@ -416,46 +420,56 @@ QtObject {
     }
     
     // Link preview metadata fetcher
+    // A single long-lived worker; requests go in as JSON lines on stdin and
+    // results come back tagged with request_url, in completion order
+    property var pendingLinkPreviews: ({})
+    property var queuedLinkPreviews: []
+    property bool linkPreviewWorkerReady: false
+
     property Process linkPreviewProcess: Process {
-        property string requestUrl: ""
-        property string requestItemId: ""
         running: false
-        
-        stdout: StdioCollector {
-            waitForEnd: true
-            
-            onStreamFinished: {
+        stdinEnabled: true
+        command: ["python3", root.linkPreviewScriptPath, "--cache", root.linkPreviewCachePath, "--media-cache", root.linkPreviewMediaPath, "--listen", "--worker", "8"]
+
+        stdout: SplitParser {
+            onRead: data => {
                 try {
-                    var metadata = JSON.parse(text);
-                    // Use request_url from the response - this is the original URL we requested
-                    // This is crucial because requestUrl property may have been overwritten
-                    // by a subsequent request before this response arrived
-                    var responseUrl = metadata.request_url || metadata.url || linkPreviewProcess.requestUrl;
-                    
+                    var metadata = JSON.parse(data);
+                    var responseUrl = metadata.request_url || metadata.url;
+                    var itemId = root.pendingLinkPreviews[responseUrl] || "";
+                    delete root.pendingLinkPreviews[responseUrl];
+
                     // Cache the result if successful, using the URL from the response
                     if (!metadata.error && responseUrl) {
                         root.linkPreviewCache[responseUrl] = metadata;
                     }
-                    // Note: requestItemId may also be stale, but the receiver validates it
-                    root.linkPreviewFetched(responseUrl, metadata, linkPreviewProcess.requestItemId);
+                    root.linkPreviewFetched(responseUrl, metadata, itemId);
                 } catch (e) {
                     console.warn("ClipboardService: Failed to parse link preview:", e);
-                    root.linkPreviewFetched(linkPreviewProcess.requestUrl, {'error': 'Failed to parse response'}, linkPreviewProcess.requestItemId);
                 }
             }
         }
-        
-        stderr: StdioCollector {
-            onStreamFinished: {
-                if (text.length > 0) {
-                    console.warn("ClipboardService: linkPreviewProcess stderr:", text);
-                }
+
+        stderr: SplitParser {
+            onRead: data => console.warn("ClipboardService: linkPreviewProcess stderr:", data)
+        }
+
+        onStarted: {
+            root.linkPreviewWorkerReady = true;
+            var queued = root.queuedLinkPreviews;
+            root.queuedLinkPreviews = [];
+            for (var i = 0; i < queued.length; i++) {
+                write(queued[i]);
             }
         }
-        
+
         onExited: function(code) {
-            if (code !== 0) {
-                root.linkPreviewFetched(linkPreviewProcess.requestUrl, {'error': 'Failed to fetch preview'}, linkPreviewProcess.requestItemId);
+            // Fail whatever was in flight; the next fetch restarts the worker
+            root.linkPreviewWorkerReady = false;
+            var pending = root.pendingLinkPreviews;
+            root.pendingLinkPreviews = {};
+            for (var url in pending) {
+                root.linkPreviewFetched(url, {'error': 'Failed to fetch preview'}, pending[url]);
             }
         }
     }
@@ -542,6 +556,13 @@ QtObject {
         if (!_initialized) return;
         _operationInProgress = true;
         deleteProcess.itemId = id;
+
+        for (var i = 0; i < items.length; i++) {
+            if (items[i].id === id) {
+                cancelLinkPrefetch({"cancel": items[i].preview.trim()});
+                break;
+            }
+        }
         
         // First, get the item's hash to check if it's currently in clipboard
         deleteProcess.command = ["sh", "-c", 
@@ -554,6 +575,7 @@ QtObject {
 
     function clear() {
         if (!_initialized) return;
+        cancelLinkPrefetch({"cancel_all": true});
         clearProcess.command = ["sh", "-c", 
             "sqlite3 '" + dbPath + "' '.timeout 5000' 'DELETE FROM clipboard_items WHERE pinned = 0;'; " +
             "wl-copy --clear 2>/dev/null || true"
@@ -643,12 +665,28 @@ QtObject {
             return;
         }
         
-        linkPreviewProcess.requestUrl = url;
-        linkPreviewProcess.requestItemId = itemId;
-        linkPreviewProcess.command = ["python3", linkPreviewScriptPath, url, "5"];
-        linkPreviewProcess.running = true;
+        // Already in flight: the result will be delivered to the latest item
+        var inFlight = pendingLinkPreviews.hasOwnProperty(url);
+        pendingLinkPreviews[url] = itemId;
+        if (inFlight) return;
+
+        var request = JSON.stringify({"url": url, "timeout": 5}) + "\n";
+        if (linkPreviewWorkerReady) {
+            linkPreviewProcess.write(request);
+        } else {
+            // Flushed from onStarted
+            queuedLinkPreviews.push(request);
+            linkPreviewProcess.running = true;
+        }
     }
     
+    // Drop a URL (or everything) from the worker's background prefetch queue
+    function cancelLinkPrefetch(request) {
+        if (!linkPreviewWorkerReady) return;
+        if (request.cancel !== undefined && !/^https?:\/\/\S+$/.test(request.cancel)) return;
+        linkPreviewProcess.write(JSON.stringify(request) + "\n");
+    }
+
     // Reorder item by moving it to a new index
     function reorderItem(itemId, newIndex) {
         if (!_initialized) return;
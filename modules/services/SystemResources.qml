@@ -31,17 +31,37 @@ Singleton {
     property int gpuCount: 0
     property bool gpuDetected: false
     property var gpuTemps: []
+    property var gpuVramUsed: []    // MiB, -1 when unknown
+    property var gpuVramTotal: []   // MiB, -1 when unknown
+    property var gpuPowers: []      // W, -1 when unknown
+    property var gpuCoreClocks: []  // MHz, -1 when unknown
+    property var gpuMemClocks: []   // MHz, -1 when unknown
     
     // Legacy single GPU properties
     property real gpuUsage: gpuUsages.length > 0 ? gpuUsages[0] : 0.0
     property string gpuVendor: gpuVendors.length > 0 ? gpuVendors[0] : "unknown"
     property int gpuTemp: gpuTemps.length > 0 ? gpuTemps[0] : -1
 
+    // Top processes by CPU and RSS (refreshed at a lower rate)
+    property var topCpuProcesses: []
+    property var topMemProcesses: []
+
     // Disk metrics
     property var diskUsage: ({})
     property var diskTypes: ({})
     property var validDisks: []
 
+    // I/O throughput: per-disk read/write bytes and ops per second,
+    // per-interface rx/tx bytes per second
+    property var diskIo: ({})
+    property var netRates: ({})
+
+    // Power and thermals: RAPL zone watts, per-battery draw/status/capacity,
+    // every thermal zone in °C
+    property var raplPower: ({})
+    property var batteries: ({})
+    property var thermalZones: ({})
+
     // History data
     property var cpuHistory: []
     property var ramHistory: []
@@ -57,12 +77,13 @@ Singleton {
     // Unified monitor process.
     // Resource-efficient: only runs when dashboard is open.
     // Optimized GPU polling avoids waking dGPUs.
+    // Subscribes to the shared monitor daemon so other consumers reuse one sampler.
     property Process monitorProcess: Process {
         id: monitorProcess
         running: GlobalStates.dashboardOpen && GlobalStates.dashboardCurrentTab === 2 && root.validDisks.length > 0
         
         command: {
-            let cmd = ["python3", Quickshell.shellDir + "/scripts/system_monitor.py", root.updateInterval.toString()];
+            let cmd = ["python3", Quickshell.shellDir + "/scripts/system_monitor.py", "--client", "--metrics", "cpu,ram,disk,gpu,procs,io,net,power,thermal", root.updateInterval.toString()];
             return cmd.concat(root.validDisks);
         }
         
@@ -96,10 +117,29 @@ Singleton {
                     }
                     
                     if (stats.disk) root.diskUsage = stats.disk.usage;
+
+                    if (stats.io) root.diskIo = stats.io;
+                    if (stats.net) root.netRates = stats.net;
+
+                    if (stats.power) {
+                        root.raplPower = stats.power.rapl;
+                        root.batteries = stats.power.battery;
+                    }
+                    if (stats.thermal) root.thermalZones = stats.thermal;
+
+                    if (stats.procs) {
+                        root.topCpuProcesses = stats.procs.cpu;
+                        root.topMemProcesses = stats.procs.mem;
+                    }
                     
                     if (stats.gpu) {
                         root.gpuUsages = stats.gpu.usages;
                         root.gpuTemps = stats.gpu.temps;
+                        root.gpuVramUsed = stats.gpu.vram_used || [];
+                        root.gpuVramTotal = stats.gpu.vram_total || [];
+                        root.gpuPowers = stats.gpu.power || [];
+                        root.gpuCoreClocks = stats.gpu.core_clock || [];
+                        root.gpuMemClocks = stats.gpu.mem_clock || [];
                     }
                     
                     root.updateHistory();
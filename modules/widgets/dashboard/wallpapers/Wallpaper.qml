@@ -179,28 +179,68 @@ PanelWindow {
         return filePath;
     }
 
-    function getLockscreenFramePath(filePath) {
+    // Tamaño físico de una pantalla, usado para las variantes del lockscreen
+    function getScreenSize(screen) {
+        return Math.round(screen.width * screen.scale) + "x" + Math.round(screen.height * screen.scale);
+    }
+
+    // screen y blurred son opcionales: sin screen se devuelve el frame completo
+    function getLockscreenFramePath(filePath, screen, blurred) {
         if (!filePath) {
             return "";
         }
 
         var fileType = getFileType(filePath);
 
-        // Para imágenes estáticas, usar el archivo original
-        if (fileType === 'image') {
+        // Para imágenes estáticas sin pantalla, usar el archivo original
+        if (fileType === 'image' && !screen) {
             return filePath;
         }
 
-        // Para videos y GIFs, usar el frame cacheado
-        if (fileType === 'video' || fileType === 'gif') {
-            var fileName = filePath.split('/').pop();
-            var cachePath = Quickshell.cacheDir + "/lockscreen/" + fileName + ".jpg";
+        // Para videos, GIFs e imágenes por pantalla, usar el frame cacheado (o su variante)
+        if (fileType === 'video' || fileType === 'gif' || fileType === 'image') {
+            // Mismo nombre que published_name() de lockwall.py: md5 de la ruta absoluta
+            var fileName = Qt.md5(filePath.replace(/\/+/g, "/"));
+            var variant = "";
+            if (screen) {
+                variant = "." + getScreenSize(screen);
+                if (blurred) {
+                    var blurRadius = Config.lockscreen.blurRadius;
+                    if (blurRadius <= 0)
+                        return "";
+                    variant += ".blur" + blurRadius;
+                }
+            }
+            var cachePath = Quickshell.cacheDir + "/lockscreen/" + fileName + variant + ".jpg";
             return cachePath;
         }
 
         return filePath;
     }
 
+    // Comando de lockwall.py con las variantes por pantalla y el tamaño de caché
+    function getLockscreenCommand(source) {
+        var scriptPath = decodeURIComponent(Qt.resolvedUrl("../../../../scripts/lockwall.py").toString().replace("file://", ""));
+        var dataPath = Quickshell.cacheDir;
+
+        var command = ["python3", scriptPath, source, dataPath, "--blur", String(Config.lockscreen.blurRadius), "--cache-size", String(Math.max(16, wallpaperPaths.length)), "--frame", "best"];
+        var screens = Quickshell.screens;
+        for (var i = 0; i < screens.length; i++) {
+            command.push("--size", getScreenSize(screens[i]));
+        }
+        return command;
+    }
+
+    // Pre-genera los frames del lockscreen para todo el directorio en segundo plano
+    function generateAllLockscreenFrames() {
+        var dir = usingFallback ? fallbackDir : wallpaperDir;
+        if (!dir || lockscreenBatchScript.running)
+            return;
+
+        lockscreenBatchScript.command = getLockscreenCommand(dir).concat(["--batch"]);
+        lockscreenBatchScript.running = true;
+    }
+
     function generateLockscreenFrame(filePath) {
         if (!filePath) {
             console.warn("generateLockscreenFrame: empty filePath");
@@ -209,10 +249,7 @@ PanelWindow {
 
         console.log("Generating lockscreen frame for:", filePath);
 
-        var scriptPath = decodeURIComponent(Qt.resolvedUrl("../../../../scripts/lockwall.py").toString().replace("file://", ""));
-        var dataPath = Quickshell.cacheDir;
-
-        lockscreenWallpaperScript.command = ["python3", scriptPath, filePath, dataPath];
+        lockscreenWallpaperScript.command = getLockscreenCommand(filePath);
 
         lockscreenWallpaperScript.running = true;
     }
@@ -784,6 +821,8 @@ PanelWindow {
             } else {
                 console.warn("⚠️ Thumbnail generation failed with code:", exitCode);
             }
+            // Después de los thumbnails, pre-generar los frames del lockscreen
+            generateAllLockscreenFrames();
         }
     }
 
@@ -825,6 +864,35 @@ PanelWindow {
         }
     }
 
+    // Proceso para pre-generar en lote los frames del lockscreen (prioridad idle)
+    Process {
+        id: lockscreenBatchScript
+        running: false
+        command: []
+
+        stdout: StdioCollector {
+            onStreamFinished: {
+                if (text.length > 0) {
+                    console.log("Lockscreen Batch Generator:", text);
+                }
+            }
+        }
+
+        stderr: StdioCollector {
+            onStreamFinished: {
+                if (text.length > 0) {
+                    console.warn("Lockscreen Batch Generator Error:", text);
+                }
+            }
+        }
+
+        onExited: function (exitCode) {
+            if (exitCode !== 0) {
+                console.warn("⚠️ Lockscreen batch generation failed with code:", exitCode);
+            }
+        }
+    }
+
     Process {
         id: scanSubfoldersProcess
         running: false
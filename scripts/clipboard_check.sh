@@ -7,6 +7,14 @@ set -euo pipefail
 DB_PATH="$1"
 SCRIPT_PATH="$2"
 DATA_DIR="$3"
+LINK_PREVIEW="$(dirname "$0")/link_preview.py"
+
+# Queue copied URLs for background link preview prefetch (no-op without a worker)
+prefetch_link() {
+	if [[ "$1" =~ ^https?://[^[:space:]]+$ ]]; then
+		python3 "$LINK_PREVIEW" --prefetch "$1" >/dev/null 2>&1 &
+	fi
+}
 
 # Check for files first (text/uri-list)
 if FILE_CONTENT=$(wl-paste --type text/uri-list 2>/dev/null); then
@@ -63,10 +71,12 @@ if TEXT_CONTENT=$(wl-paste --type 'text/plain;charset=utf-8' 2>/dev/null); then
 	HASH=$(echo -n "$TEXT_CONTENT" | md5sum | cut -d' ' -f1)
 	TEXT_SIZE=${#TEXT_CONTENT}
 	echo -n "$TEXT_CONTENT" | "$SCRIPT_PATH" "$DB_PATH" "$HASH" "text/plain" 0 "" "$TEXT_SIZE"
+	prefetch_link "$TEXT_CONTENT"
 	exit 0
 elif TEXT_CONTENT=$(wl-paste --type text/plain 2>/dev/null); then
 	HASH=$(echo -n "$TEXT_CONTENT" | md5sum | cut -d' ' -f1)
 	TEXT_SIZE=${#TEXT_CONTENT}
 	echo -n "$TEXT_CONTENT" | "$SCRIPT_PATH" "$DB_PATH" "$HASH" "text/plain" 0 "" "$TEXT_SIZE"
+	prefetch_link "$TEXT_CONTENT"
 	exit 0
 fi
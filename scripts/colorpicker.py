@@ -1,114 +1,327 @@
 #!/usr/bin/env python3
 
 import colorsys
+import json
+import os
+import shutil
+import struct
 import subprocess
 import sys
 import tempfile
+import time
+import zlib
 from pathlib import Path
 
+DEPENDENCIES = ("grim", "slurp", "wl-copy", "notify-send")
+
+# Per-user runtime dir (tmpfs) avoids tempfile's writability probing at startup
+STATE_DIR = Path(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir())
+DEPS_STATE = STATE_DIR / "color_picker_deps.json"
+SWATCH_SIZE = 64
+SWATCH_DIR = STATE_DIR / "color_picker_swatches"
+
 
 def cmd(*args, input=None):
     return subprocess.check_output(args, input=input)
 
 
-for dep in ("grim", "slurp", "magick", "wl-copy", "notify-send"):
-    if subprocess.call(["which", dep], stdout=subprocess.DEVNULL) != 0:
-        subprocess.call(
-            [
-                "notify-send",
-                "Color Picker",
-                f"Missing dependency: {dep}",
-                "-u",
-                "critical",
-            ]
-        )
-        sys.exit(1)
-
-coords = cmd("slurp", "-p").decode().strip()
-if not coords:
-    sys.exit(0)
-
-raw = subprocess.Popen(["grim", "-g", coords, "-t", "ppm", "-"], stdout=subprocess.PIPE)
-
-rgb_str = cmd(
-    "magick",
-    "-",
-    "-format",
-    "%[fx:int(255*r)] %[fx:int(255*g)] %[fx:int(255*b)]",
-    "info:-",
-    input=raw.stdout.read(),
-).decode()
-
-r, g, b = map(int, rgb_str.split())
-
-hex_color = f"#{r:02X}{g:02X}{b:02X}"
-rgb_color = f"rgb({r}, {g}, {b})"
-
-rn, gn, bn = r / 255, g / 255, b / 255
-h, s, v = colorsys.rgb_to_hsv(rn, gn, bn)
-hsv_color = f"hsv({round(h*360)}, {round(s*100)}%, {round(v*100)}%)"
-
-icon = Path(tempfile.gettempdir()) / "color_picker_preview.png"
-cmd("magick", "-size", "64x64", f"xc:{hex_color}", str(icon))
-
-subprocess.run(["wl-copy"], input=hex_color.encode())
-
-proc = subprocess.Popen(
-    [
-        "notify-send",
-        "Color Picked",
-        f"{hex_color} copied to clipboard",
-        "-i",
-        str(icon),
-        "-a",
-        "ColorPicker",
-        "-u",
-        "normal",
-        "--action=hex=Copy HEX",
-        "--action=rgb=Copy RGB",
-        "--action=hsv=Copy HSV",
-    ],
-    stdout=subprocess.PIPE,
-)
-
-action = proc.communicate()[0].decode().strip()
-
-if action == "rgb":
-    subprocess.run(["wl-copy"], input=rgb_color.encode())
-    subprocess.call(
-        [
-            "notify-send",
-            "Color Picker",
-            f"RGB copied: {rgb_color}",
-            "-i",
-            str(icon),
-            "-u",
-            "low",
-        ]
+def read_ppm_pixel(data):
+    """Return the first pixel of a binary (P6) PPM as 8-bit (r, g, b)."""
+    fields = []
+    pos = 2
+    if data[:2] != b"P6":
+        raise ValueError("not a binary PPM")
+    while len(fields) < 3:
+        # Skip whitespace and comments between header fields
+        while pos < len(data) and (data[pos : pos + 1].isspace() or data[pos] == 35):
+            if data[pos] == 35:
+                pos = data.index(b"\n", pos)
+            pos += 1
+        start = pos
+        while pos < len(data) and data[pos : pos + 1].isdigit():
+            pos += 1
+        if start == pos:
+            raise ValueError("truncated PPM header")
+        fields.append(int(data[start:pos]))
+    pos += 1  # Single whitespace before the raster
+
+    maxval = fields[2]
+    width = 2 if maxval > 255 else 1
+    sample = data[pos : pos + 3 * width]
+    if len(sample) < 3 * width:
+        raise ValueError("truncated PPM raster")
+    if width == 2:
+        values = struct.unpack(">3H", sample)
+    else:
+        values = tuple(sample)
+    return tuple(value * 255 // maxval for value in values)
+
+
+def png_chunk(kind, payload):
+    chunk = kind + payload
+    return (
+        struct.pack(">I", len(payload)) + chunk + struct.pack(">I", zlib.crc32(chunk))
     )
-elif action == "hsv":
-    subprocess.run(["wl-copy"], input=hsv_color.encode())
-    subprocess.call(
+
+
+def swatch_png(rgb, size=SWATCH_SIZE):
+    """Encode a solid size x size RGB PNG."""
+    row = b"\x00" + bytes(rgb) * size  # Filter type 0 per scanline
+    return b"".join(
         [
-            "notify-send",
-            "Color Picker",
-            f"HSV copied: {hsv_color}",
-            "-i",
-            str(icon),
-            "-u",
-            "low",
+            b"\x89PNG\r\n\x1a\n",
+            png_chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)),
+            png_chunk(b"IDAT", zlib.compress(row * size, 9)),
+            png_chunk(b"IEND", b""),
         ]
     )
-elif action == "hex":
+
+
+def swatch_path(rgb):
+    """Path of the cached swatch for a color, writing it on first use."""
+    path = SWATCH_DIR / ("%02X%02X%02X.png" % tuple(rgb))
+    if not path.exists():
+        SWATCH_DIR.mkdir(parents=True, exist_ok=True)
+        # Concurrent pickers of the same color must not share a temporary
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(swatch_png(rgb))
+        tmp_path.replace(path)
+    return path
+
+
+def dependency_state():
+    """Resolve every dependency with shutil.which; None if any is missing."""
+    binaries = {}
+    for dep in DEPENDENCIES:
+        path = shutil.which(dep)
+        if path is None:
+            return None
+        binaries[dep] = [path, os.stat(path).st_mtime_ns]
+    return {"path": os.environ.get("PATH", ""), "binaries": binaries}
+
+
+def cached_state_valid():
+    """Whether the saved lookup still matches PATH and the binaries' mtimes."""
+    try:
+        state = json.loads(DEPS_STATE.read_text())
+        if state["path"] != os.environ.get("PATH", ""):
+            return False
+        if set(state["binaries"]) != set(DEPENDENCIES):
+            return False
+        return all(
+            os.stat(path).st_mtime_ns == mtime
+            for path, mtime in state["binaries"].values()
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def missing_dependencies():
+    """Names of missing dependencies, trusting the cached lookup when valid."""
+    if cached_state_valid():
+        return []
+
+    state = dependency_state()
+    if state is None:
+        return [dep for dep in DEPENDENCIES if shutil.which(dep) is None]
+
+    try:
+        tmp_path = DEPS_STATE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state))
+        tmp_path.replace(DEPS_STATE)
+    except OSError:
+        pass
+    return []
+
+
+def legacy_missing_dependencies():
+    """The previous check, one `which` process per dependency (benchmark baseline)."""
+    return [
+        dep
+        for dep in DEPENDENCIES
+        if subprocess.call(
+            ["which", dep], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        != 0
+    ]
+
+
+def pick_color():
+    """Pick a pixel with slurp/grim, copy it and offer the other formats."""
+    coords = cmd("slurp", "-p").decode().strip()
+    if not coords:
+        return
+
+    r, g, b = read_ppm_pixel(cmd("grim", "-g", coords, "-t", "ppm", "-"))
+
+    hex_color = f"#{r:02X}{g:02X}{b:02X}"
+    rgb_color = f"rgb({r}, {g}, {b})"
+
+    rn, gn, bn = r / 255, g / 255, b / 255
+    h, s, v = colorsys.rgb_to_hsv(rn, gn, bn)
+    hsv_color = f"hsv({round(h*360)}, {round(s*100)}%, {round(v*100)}%)"
+
+    icon = swatch_path((r, g, b))
+
     subprocess.run(["wl-copy"], input=hex_color.encode())
-    subprocess.call(
+
+    proc = subprocess.Popen(
         [
             "notify-send",
-            "Color Picker",
-            f"HEX copied: {hex_color}",
+            "Color Picked",
+            f"{hex_color} copied to clipboard",
             "-i",
             str(icon),
+            "-a",
+            "ColorPicker",
             "-u",
-            "low",
-        ]
+            "normal",
+            "--action=hex=Copy HEX",
+            "--action=rgb=Copy RGB",
+            "--action=hsv=Copy HSV",
+        ],
+        stdout=subprocess.PIPE,
     )
+
+    action = proc.communicate()[0].decode().strip()
+
+    if action == "rgb":
+        subprocess.run(["wl-copy"], input=rgb_color.encode())
+        subprocess.call(
+            [
+                "notify-send",
+                "Color Picker",
+                f"RGB copied: {rgb_color}",
+                "-i",
+                str(icon),
+                "-u",
+                "low",
+            ]
+        )
+    elif action == "hsv":
+        subprocess.run(["wl-copy"], input=hsv_color.encode())
+        subprocess.call(
+            [
+                "notify-send",
+                "Color Picker",
+                f"HSV copied: {hsv_color}",
+                "-i",
+                str(icon),
+                "-u",
+                "low",
+            ]
+        )
+    elif action == "hex":
+        subprocess.run(["wl-copy"], input=hex_color.encode())
+        subprocess.call(
+            [
+                "notify-send",
+                "Color Picker",
+                f"HEX copied: {hex_color}",
+                "-i",
+                str(icon),
+                "-u",
+                "low",
+            ]
+        )
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def run_benchmark(runs):
+    """Time startup to slurp-ready: cold, cached and legacy dependency checks.
+
+    Every run is a fresh --dry-run process, so all three also pay for the
+    interpreter and argparse, which plain runs skip; only the check differs.
+    """
+    script = [sys.executable, str(Path(__file__).resolve()), "--dry-run"]
+
+    def timed(command):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return (time.perf_counter() - start) * 1000
+
+    cold, warm, legacy = [], [], []
+    for _ in range(runs):
+        DEPS_STATE.unlink(missing_ok=True)
+        cold.append(timed(script))
+        warm.append(timed(script))
+        legacy.append(timed(script + ["--legacy-check"]))
+
+    print(
+        json.dumps(
+            {
+                "runs": runs,
+                "missing": missing_dependencies(),
+                "startup_cold_ms": round(median(cold), 2),
+                "startup_cached_ms": round(median(warm), 2),
+                "startup_legacy_ms": round(median(legacy), 2),
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+def parse_args():
+    import argparse  # Only needed when flags are given; keeps plain runs fast
+
+    parser = argparse.ArgumentParser(description="Pick a color from the screen")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Check dependencies and exit where slurp would start",
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Measure startup time to slurp-ready over N runs",
+    )
+    parser.add_argument(
+        "--legacy-check",
+        action="store_true",
+        help="Check dependencies with one `which` process each (benchmark baseline)",
+    )
+    args = parser.parse_args()
+    if args.benchmark is not None and args.benchmark < 1:
+        parser.error("--benchmark needs at least 1 run")
+    return args
+
+
+def main():
+    dry_run = False
+    check = missing_dependencies
+    if len(sys.argv) > 1:
+        args = parse_args()
+        if args.benchmark is not None:
+            return run_benchmark(args.benchmark)
+        dry_run = args.dry_run
+        if args.legacy_check:
+            check = legacy_missing_dependencies
+
+    for dep in check():
+        subprocess.call(
+            [
+                "notify-send",
+                "Color Picker",
+                f"Missing dependency: {dep}",
+                "-u",
+                "critical",
+            ]
+        )
+        return 1
+
+    if not dry_run:
+        pick_color()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
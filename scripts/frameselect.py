@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Representative Frame Selection for Ambxst Wallpaper Tools
+Samples keyframes of a video at low resolution and scores them by mean luma
+and entropy, so thumbnails and lockscreen frames skip black fade-ins.
+The chosen timestamp is cached per source and shared by every consumer.
+"""
+
+import fcntl
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Sampling settings: keyframe-only decode, tiny grayscale frames
+SAMPLE_SIZE = 64
+SAMPLE_WINDOW = 60  # seconds of the source considered
+MAX_SAMPLES = 24
+SAMPLE_TIMEOUT = 20
+
+# Frames within this fraction of the best score count as equally good;
+# the earliest of them wins so the pick stays close to the opening look
+SCORE_TOLERANCE = 0.95
+
+# Mean luma below/above which a frame is considered too dark/bright
+EXPOSURE_MARGIN = 48
+
+CACHE_FILE = "frameselect.json"
+MAX_CACHE_ENTRIES = 512
+
+PTS_TIME_RE = re.compile(r"\bpts_time:\s*(-?[\d.]+)")
+
+
+def score_frame(pixels: bytes) -> float:
+    """Score a grayscale frame: histogram entropy weighted by exposure."""
+    if not pixels:
+        return 0.0
+
+    total = len(pixels)
+    histogram = Counter(pixels)
+    entropy = -sum(
+        (count / total) * math.log2(count / total) for count in histogram.values()
+    )
+    mean = sum(value * count for value, count in histogram.items()) / total
+
+    exposure = min(1.0, mean / EXPOSURE_MARGIN) * min(
+        1.0, (255 - mean) / EXPOSURE_MARGIN
+    )
+    return max(0.0, entropy * exposure)
+
+
+def sample_keyframes(source: Path) -> List[Tuple[float, bytes]]:
+    """Decode keyframes only, at SAMPLE_SIZE squared grayscale, with timestamps."""
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-skip_frame",
+        "nokey",  # Decode keyframes only
+        "-t",
+        str(SAMPLE_WINDOW),
+        "-i",
+        str(source),
+        "-an",
+        "-sn",
+        "-dn",
+        "-vf",
+        f"showinfo,scale={SAMPLE_SIZE}:{SAMPLE_SIZE}:flags=fast_bilinear,format=gray",
+        "-fps_mode",
+        "passthrough",
+        "-frames:v",
+        str(MAX_SAMPLES),
+        "-f",
+        "rawvideo",
+        "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True, timeout=SAMPLE_TIMEOUT)
+    if result.returncode != 0:
+        return []
+
+    frame_bytes = SAMPLE_SIZE * SAMPLE_SIZE
+    times = [
+        float(match.group(1))
+        for match in PTS_TIME_RE.finditer(result.stderr.decode(errors="replace"))
+    ]
+    frames = [
+        result.stdout[offset : offset + frame_bytes]
+        for offset in range(0, len(result.stdout) - frame_bytes + 1, frame_bytes)
+    ]
+    return list(zip(times, frames))
+
+
+def choose_frame_time(samples: List[Tuple[float, bytes]]) -> Optional[float]:
+    """Earliest sample scoring within SCORE_TOLERANCE of the best one."""
+    if not samples:
+        return None
+
+    scored = [(timestamp, score_frame(pixels)) for timestamp, pixels in samples]
+    best = max(score for _, score in scored)
+    for timestamp, score in scored:
+        if score >= best * SCORE_TOLERANCE:
+            return max(0.0, timestamp)
+    return None
+
+
+class FrameTimeCache:
+    """Chosen timestamps per source, shared between thumbnail and lockscreen."""
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / CACHE_FILE
+        self.lock_path = Path(cache_dir) / f".{CACHE_FILE}.lock"
+
+    @staticmethod
+    def source_key(source: Path) -> str:
+        """Cache key for a source file: resolved path, size and mtime."""
+        stat = source.stat()
+        identity = f"{source.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        return hashlib.sha1(identity.encode()).hexdigest()[:24]
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, key: str) -> Tuple[bool, Optional[float]]:
+        """(hit, timestamp); a hit with None means no usable frame was found."""
+        entry = self._load().get(key)
+        if not isinstance(entry, dict) or "time" not in entry:
+            return False, None
+        if isinstance(entry["time"], (int, float)):
+            return True, float(entry["time"])
+        return True, None
+
+    def put(self, key: str, source: Path, timestamp: Optional[float]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            entries[key] = {
+                "source": str(source.resolve()),
+                "time": timestamp,
+                "scored": time.time(),
+            }
+            while len(entries) > MAX_CACHE_ENTRIES:
+                oldest = min(entries, key=lambda k: entries[k].get("scored", 0))
+                del entries[oldest]
+
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(entries, indent=1))
+            os.replace(tmp_path, self.path)
+
+
+def select_frame_time(source: Path, cache_dir: Path) -> Optional[float]:
+    """Timestamp of the most representative frame of source, or None.
+
+    Cached per source (path, size, mtime), so later runs and other output
+    sizes reuse the choice without re-scoring. Sources with no usable
+    keyframe are cached as None too, so they are not decoded every run.
+    """
+    source = Path(source)
+    cache = FrameTimeCache(cache_dir)
+    try:
+        key = cache.source_key(source)
+    except OSError:
+        return None
+
+    hit, timestamp = cache.get(key)
+    if hit:
+        return timestamp
+
+    try:
+        timestamp = choose_frame_time(sample_keyframes(source))
+    except (OSError, subprocess.SubprocessError):
+        # ffmpeg missing or timed out: worth retrying next time
+        return None
+    cache.put(key, source, timestamp)
+    return timestamp
+
+
+def main():
+    """Entry point: print the chosen timestamp for a video."""
+    if len(sys.argv) != 3:
+        print("Usage: python3 frameselect.py <video_path> <cache_dir>")
+        return 1
+
+    timestamp = select_frame_time(Path(sys.argv[1]).expanduser(), Path(sys.argv[2]))
+    print(json.dumps({"time": timestamp}))
+    return 0 if timestamp is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,105 +3,726 @@
 Link preview metadata extractor using Open Graph and Twitter Card metadata.
 Fetches title, description, image, and other metadata from URLs.
 Includes special support for YouTube, Twitter, and other oEmbed services.
+
+Usage:
+    link_preview.py [--cache DB] [--verify-media] [--media-cache DIR] <url> [timeout]
+    link_preview.py [--cache DB] [--verify-media] [--media-cache DIR] --worker [concurrency]
+    link_preview.py --benchmark N [--tls]
+    link_preview.py [--providers FILE] --check-providers
+    link_preview.py [--socket PATH] --prefetch URL | --cancel URL
+
+Worker mode reads one JSON request per line on stdin ({"url": ..., and
+optionally "timeout"}) and writes one JSON result per line, tagged with
+"request_url", as soon as each fetch finishes. With a cache, lines of the
+form {"prefetch": url} / {"cancel": url} manage a low-priority queue that
+only warms the cache; --listen accepts the same lines on a Unix socket so
+the clipboard watcher can push URLs as they are copied (--prefetch URL).
+
+With --cache, results are kept in an SQLite database. Fresh entries are
+served without touching the network; stale HTML previews are revalidated
+with If-None-Match/If-Modified-Since before being fetched again.
+
+--verify-media probes every declared og:image/twitter:image and favicon
+and keeps the first that really serves an image; --media-cache also stores
+a downscaled local copy and returns its file:// URL.
+
+YouTube, X, Reddit, GitHub and Vimeo links are answered from their oEmbed
+or JSON APIs. The providers are declared in link_providers.json (hosts,
+URL patterns, endpoint and field mapping) and routed by hostname.
+
+Requests go through a keep-alive ConnectionPool, so a worker talking to
+the same hosts repeatedly skips the TCP and TLS handshakes.
 """
 
+import argparse
+import base64
+import codecs
+import email.utils
+import hashlib
+import http.client
+import http.server
 import json
+import os
 import re
+import shutil
+import socket
+import sqlite3
+import ssl
+import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import urllib.error
 import urllib.request
 from html.parser import HTMLParser
-from urllib.parse import quote, urljoin, urlparse
+from urllib.parse import (
+    quote,
+    unquote,
+    urldefrag,
+    urljoin,
+    urlparse,
+    urlunparse,
+)
+
+# Seconds a preview stays fresh; failures are retried much sooner
+PREVIEW_TTL = 24 * 60 * 60
+ERROR_TTL = 10 * 60
+# Timeouts are usually transient; our own HostLimiter refusals always are,
+# so they are never stored
+TIMEOUT_TTL = 30
+UNCACHED_ERRORS = ("Rate limited",)
+# Rows are kept past expiry for revalidation, but not forever
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+CACHE_MAX_ROWS = 5000
+CACHE_PRUNE_EVERY = 100
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only identify the click, never the content
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_hsenc",
+    "_hsmi",
+    "ref_src",
+    "ref_url",
+    "si",
+}
+API_USER_AGENT = "ambxst-link-preview"
+
+# Per-host politeness for the shared pool
+HOST_MAX_ACTIVE = 2
+HOST_RATE = 4.0
+HOST_BURST = 4
+MAX_RETRY_AFTER = 300
+
+# Pages are streamed in chunks until the head is parsed, up to MAX_HTML_BYTES.
+# Decoded text is fed to the parser in slices so it can stop mid-chunk.
+HTML_CHUNK = 16 * 1024
+PARSE_SLICE = 2048
+MAX_HTML_BYTES = 500 * 1024
+# Unread bodies up to this size are drained so the connection can be reused
+DRAIN_LIMIT = 64 * 1024
+# Ceilings for everything else read into memory
+MAX_JSON_BYTES = 1024 * 1024
+MAX_REDIRECTS = 5
+
+# Body prefixes that mean "not a web page", whatever the Content-Type says
+BINARY_SIGNATURES = (
+    b"%PDF",
+    b"PK\x03\x04",
+    b"\x1f\x8b",
+    b"ID3",
+    b"OggS",
+    b"RIFF",
+    b"\x1a\x45\xdf\xa3",  # Matroska/WebM
+    b"7z\xbc\xaf",
+    b"Rar!",
+)
+HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<meta", b"<title", b"<!--")
+# Content types worth reading far enough to sniff; anything else is refused
+SNIFF_BYTES = 512
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+SNIFFABLE_TYPES = HTML_TYPES + ("text/plain", "")
+
+# Media verification: probe with a ranged GET, download at most this much
+IMAGE_PROBE_BYTES = 1024
+MAX_MEDIA_BYTES = 5 * 1024 * 1024
+# Local media copies are dropped once unused this long or over the size cap,
+# least recently used first; previews pointing at them are refetched
+MEDIA_CACHE_MAX_AGE = CACHE_MAX_AGE
+MEDIA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MEDIA_PRUNE_EVERY = 50
+IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",
+    b"GIF8",
+    b"\x00\x00\x01\x00",  # ICO
+    b"BM",
+)
+
+META_CHARSET = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([-\w.:]+)""", re.IGNORECASE
+)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+class TLSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that resumes TLS sessions remembered by its pool."""
+
+    def __init__(self, host, port, timeout, context, sessions):
+        super().__init__(host, port, timeout=timeout, context=context)
+        self.sessions = sessions
+
+    def origin(self):
+        """(host, port) of the server, not of a CONNECT proxy in between."""
+        if self._tunnel_host:
+            return self._tunnel_host, self._tunnel_port
+        return self.host, self.port
+
+    def connect(self):
+        # Opens the CONNECT tunnel too when set_tunnel() was called
+        http.client.HTTPConnection.connect(self)
+        session = None
+        if self.sessions is not None:
+            session = self.sessions.get(self.origin())
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self.origin()[0], session=session
+        )
 
+    def remember_session(self):
+        # TLS 1.3 tickets only arrive after the handshake, so this is
+        # called once a response has been read
+        if self.sessions is not None and isinstance(self.sock, ssl.SSLSocket):
+            if self.sock.session is not None:
+                self.sessions[self.origin()] = self.sock.session
+
+    def close(self):
+        self.remember_session()
+        super().close()
+
+
+class PooledResponse:
+    """A response whose connection goes back to the pool once fully read."""
+
+    def __init__(self, pool, key, conn, response, url, deadline):
+        self.pool = pool
+        self.key = key
+        self.conn = conn
+        self.response = response
+        self.url = url
+        self.deadline = deadline
+        self.status = response.status
+        self.headers = response.headers
+
+    def geturl(self):
+        return self.url
+
+    def _arm_deadline(self):
+        """Bound the next socket read by what is left of the request budget."""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("deadline exceeded")
+        if self.conn is not None and self.conn.sock is not None:
+            self.conn.sock.settimeout(remaining)
+
+    def read1(self, amt):
+        """Return whatever is available, up to amt bytes."""
+        self._arm_deadline()
+        chunk = self.response.read1(amt)
+        if self.response.length == 0:
+            # read1() stops at Content-Length without marking the response
+            # done, which would keep the connection out of the pool
+            self.response.close()
+        return chunk
+
+    def read(self, limit):
+        """
+        Read the whole body, which must not exceed limit bytes. Reads in
+        pieces so a slow-drip server can't outlast the deadline.
+        """
+        chunks, total = [], 0
+        while True:
+            chunk = self.read1(min(HTML_CHUNK, limit + 1 - total))
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+            total += len(chunk)
+            if total > limit:
+                raise ValueError(f"response larger than {limit} bytes")
+
+    def close(self):
+        if self.conn is None:
+            return
+        length = self.response.length
+        if not self.response.isclosed() and length is not None:
+            if length <= DRAIN_LIMIT:
+                try:
+                    self.read(DRAIN_LIMIT)
+                except (OSError, ValueError, http.client.HTTPException):
+                    pass
+        # A half-read body would poison the next request on this socket
+        if self.response.isclosed() and not self.response.will_close:
+            self.pool.release(self.key, self.conn)
+        else:
+            self.response.close()
+            self.conn.close()
+        self.conn = None
+        if self.pool.limiter:
+            self.pool.limiter.release(self.key[1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, int(when.timestamp() - time.time()))
 
-def extract_youtube_id(url):
-    """Extract YouTube video ID from various YouTube URL formats."""
-    patterns = [
-        r"(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]{11})",
-        r"youtube\.com\/embed\/([a-zA-Z0-9_-]{11})",
-        r"youtube\.com\/v\/([a-zA-Z0-9_-]{11})",
-        r"youtube\.com\/shorts\/([a-zA-Z0-9_-]{11})",
-    ]
 
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+class RateLimited(urllib.error.URLError):
+    """A request the HostLimiter refused to wait for."""
 
+    def __init__(self, host, retry_after):
+        super().__init__(f"{host} is rate limited")
+        self.retry_after = retry_after
 
-def fetch_youtube_metadata(url, timeout=5):
-    """Fetch metadata from YouTube using oEmbed API."""
-    video_id = extract_youtube_id(url)
-    if not video_id:
-        return None
 
-    try:
-        # Use YouTube oEmbed API
-        oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-
-        req = urllib.request.Request(oembed_url)
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            data = json.loads(response.read().decode("utf-8"))
-
-        # YouTube oEmbed returns: title, author_name, thumbnail_url, etc.
-        # Try to get maxresdefault (1280x720), fall back to hqdefault
-        thumbnail = data.get("thumbnail_url", "")
-        if "hqdefault" in thumbnail:
-            # Try maxresdefault first
-            maxres_thumbnail = thumbnail.replace("hqdefault", "maxresdefault")
-            # We'll use maxresdefault - if it doesn't exist, YouTube will return hqdefault anyway
-            thumbnail = maxres_thumbnail
+class HostLimiter:
+    """
+    Per-host request gate: at most max_active requests in flight, a token
+    bucket refilling at rate/s up to burst, and a pause after a 429/503
+    with Retry-After. Waits that don't fit in the caller's timeout fail
+    right away instead of holding a worker.
+    """
 
-        return {
-            "title": data.get("title", ""),
-            "description": f"{data.get('author_name', 'Unknown')}",
-            "image": thumbnail,
-            "url": url,
-            "request_url": url,
-            "site_name": "YouTube",
-            "type": "video",
-            "favicon": "https://www.youtube.com/s/desktop/9c0f82da/img/favicon_144x144.png",
-            "author": data.get("author_name", ""),
-            "video_id": video_id,
-        }
-    except Exception as e:
-        return None
+    def __init__(self, max_active=HOST_MAX_ACTIVE, rate=HOST_RATE, burst=HOST_BURST):
+        self.max_active = max_active
+        self.rate = rate
+        self.burst = burst
+        self.hosts = {}
+        self.cond = threading.Condition()
+
+    def _state(self, host, now):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = {
+                "active": 0,
+                "tokens": float(self.burst),
+                "stamp": now,
+                "blocked_until": 0.0,
+            }
+        state["tokens"] = min(
+            self.burst, state["tokens"] + (now - state["stamp"]) * self.rate
+        )
+        state["stamp"] = now
+        return state
+
+    def acquire(self, host, timeout):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                state = self._state(host, now)
+                if state["blocked_until"] > now:
+                    wait = state["blocked_until"] - now
+                elif state["active"] >= self.max_active:
+                    wait = None  # until a request finishes
+                elif state["tokens"] < 1:
+                    wait = (1 - state["tokens"]) / self.rate
+                else:
+                    state["tokens"] -= 1
+                    state["active"] += 1
+                    return
+                remaining = deadline - now
+                if remaining <= 0 or (wait is not None and wait > remaining):
+                    raise RateLimited(host, int(wait or 0) + 1)
+                self.cond.wait(remaining if wait is None else wait)
+
+    def release(self, host):
+        with self.cond:
+            self.hosts[host]["active"] -= 1
+            self.cond.notify_all()
+
+    def back_off(self, host, seconds):
+        with self.cond:
+            state = self._state(host, time.monotonic())
+            until = state["stamp"] + min(seconds, MAX_RETRY_AFTER)
+            state["blocked_until"] = max(state["blocked_until"], until)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections keyed by (scheme, host, port, proxy).
 
+    At most max_idle_per_host idle connections are kept per host and
+    max_idle overall; anything idle for longer than idle_timeout is closed
+    on the next acquire. TLS sessions are remembered per host so even new
+    connections resume instead of doing a full handshake. With
+    reuse=False every request gets a fresh connection and handshake.
+    An optional HostLimiter gates every request, redirects included.
 
-def fetch_twitter_metadata(url, timeout=5):
-    """Fetch metadata from Twitter/X using oEmbed API."""
-    try:
-        # Twitter oEmbed API
-        oembed_url = f"https://publish.twitter.com/oembed?url={quote(url)}"
+    Proxies come from the environment (http_proxy, https_proxy, no_proxy)
+    as urllib would use them, unless given explicitly: https goes through
+    a CONNECT tunnel, plain http sends absolute-URI requests to the proxy.
 
-        req = urllib.request.Request(oembed_url)
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            data = json.loads(response.read().decode("utf-8"))
+    Errors are raised as urllib.error.HTTPError/URLError.
+    """
 
-        return {
-            "title": data.get("author_name", "Tweet"),
-            "description": re.sub(r"<[^>]+>", "", data.get("html", "")),  # Strip HTML
+    def __init__(
+        self,
+        max_idle_per_host=4,
+        max_idle=32,
+        idle_timeout=30.0,
+        reuse=True,
+        context=None,
+        limiter=None,
+        proxies=None,
+    ):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.reuse = reuse
+        self.context = context or ssl.create_default_context()
+        self.sessions = {} if reuse else None
+        self.limiter = limiter
+        if proxies is None:
+            proxies = urllib.request.getproxies()
+        self.proxies = proxies
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        for key in list(self.idle):
+            conns = self.idle[key]
+            while conns and now - conns[0][1] > self.idle_timeout:
+                conns.pop(0)[0].close()
+            if not conns:
+                del self.idle[key]
+
+    def acquire(self, key, timeout):
+        """Return (connection, reused) for key."""
+        with self.lock:
+            self._evict_expired(time.monotonic())
+            conns = self.idle.get(key)
+            if conns:
+                conn = conns.pop()[0]
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        scheme, host, port, proxy = key
+        if proxy:
+            proxy_host, proxy_port = proxy
+            if scheme == "https":
+                conn = TLSConnection(
+                    proxy_host, proxy_port, timeout, self.context, self.sessions
+                )
+                conn.set_tunnel(host, port, headers=self._proxy_headers(scheme))
+            else:
+                conn = http.client.HTTPConnection(
+                    proxy_host, proxy_port, timeout=timeout
+                )
+        elif scheme == "https":
+            conn = TLSConnection(host, port, timeout, self.context, self.sessions)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _proxy_url(self, scheme):
+        """Parsed proxy URL configured for scheme, or None."""
+        proxy = self.proxies.get(scheme)
+        if not proxy:
+            return None
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        return urlparse(proxy)
+
+    def proxy_for(self, scheme, host):
+        """(host, port) of the proxy to use, or None."""
+        proxy = self._proxy_url(scheme)
+        if proxy is None or not proxy.hostname:
+            return None
+        if urllib.request.proxy_bypass_environment(host, self.proxies):
+            return None
+        return proxy.hostname, proxy.port or 80
+
+    def _proxy_headers(self, scheme):
+        """Proxy-Authorization for credentials embedded in the proxy URL."""
+        proxy = self._proxy_url(scheme)
+        if proxy is None or proxy.username is None:
+            return {}
+        credentials = "%s:%s" % (
+            unquote(proxy.username),
+            unquote(proxy.password or ""),
+        )
+        token = base64.b64encode(credentials.encode()).decode("ascii")
+        return {"Proxy-Authorization": "Basic " + token}
+
+    def release(self, key, conn):
+        if not self.reuse:
+            conn.close()
+            return
+        if isinstance(conn, TLSConnection):
+            conn.remember_session()
+        with self.lock:
+            conns = self.idle.setdefault(key, [])
+            conns.append((conn, time.monotonic()))
+            if len(conns) > self.max_idle_per_host:
+                conns.pop(0)[0].close()
+            if sum(len(c) for c in self.idle.values()) > self.max_idle:
+                oldest = min(self.idle, key=lambda k: self.idle[k][0][1])
+                self.idle[oldest].pop(0)[0].close()
+                if not self.idle[oldest]:
+                    del self.idle[oldest]
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn, _ in conns:
+                    conn.close()
+            self.idle.clear()
+
+    def _send(self, key, method, target, headers, timeout):
+        # A reused socket may have been closed by the server while idle;
+        # that only shows up on use, so retry once on a fresh connection
+        for attempt in range(2):
+            conn, reused = self.acquire(key, timeout)
+            try:
+                conn.request(method, target, headers=headers)
+                return conn, conn.getresponse()
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ) as e:
+                conn.close()
+                if not reused:
+                    raise urllib.error.URLError(e)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+        raise urllib.error.URLError("connection reset")
+
+    def open(
+        self, url, headers=None, timeout=5, deadline=None, max_redirects=MAX_REDIRECTS
+    ):
+        """
+        GET url, following up to max_redirects redirects. Returns a
+        PooledResponse.
+
+        timeout is a budget for the whole exchange (throttling, connects,
+        every hop and the body reads), not a per-socket-call timeout;
+        callers making several requests can share one monotonic deadline.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        headers = dict(headers or {})
+        headers["Connection"] = "keep-alive" if self.reuse else "close"
+        for _ in range(max_redirects + 1):
+            parsed = urlparse(url)
+            if parsed.scheme not in ("http", "https") or not parsed.hostname:
+                raise urllib.error.URLError(f"unsupported URL {url}")
+            port = parsed.port or (443 if parsed.scheme == "https" else 80)
+            proxy = self.proxy_for(parsed.scheme, parsed.hostname)
+            key = (parsed.scheme, parsed.hostname, port, proxy)
+            target = parsed.path or "/"
+            if parsed.query:
+                target += "?" + parsed.query
+            request_headers = headers
+            if proxy and parsed.scheme == "http":
+                # Plain http proxies take the absolute URI
+                target = urlunparse(parsed._replace(fragment=""))
+                request_headers = dict(headers, **self._proxy_headers("http"))
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise urllib.error.URLError("timed out")
+            if self.limiter:
+                self.limiter.acquire(key[1], remaining)
+            try:
+                remaining = max(0.001, deadline - time.monotonic())
+                conn, raw = self._send(key, "GET", target, request_headers, remaining)
+            except urllib.error.URLError:
+                if self.limiter:
+                    self.limiter.release(key[1])
+                raise
+            response = PooledResponse(self, key, conn, raw, url, deadline)
+            location = raw.getheader("Location")
+            if response.status in REDIRECT_CODES and location:
+                # Redirect bodies are tiny; close() drains them so the
+                # socket is reusable
+                response.close()
+                url = urljoin(url, location)
+                continue
+            if response.status >= 300:
+                response.close()
+                retry_after = parse_retry_after(raw.getheader("Retry-After"))
+                if response.status in (429, 503) and retry_after is not None:
+                    if self.limiter:
+                        self.limiter.back_off(key[1], retry_after)
+                raise urllib.error.HTTPError(
+                    url, response.status, raw.reason, response.headers, None
+                )
+            return response
+        raise urllib.error.URLError("Too many redirects")
+
+
+# Shared by every fetch in this process (worker threads included)
+HTTP_POOL = ConnectionPool(limiter=HostLimiter())
+
+
+def fetch_json(url, timeout=5, pool=None, deadline=None):
+    """GET a small JSON document through the pool."""
+    # Some APIs (GitHub) refuse requests without a User-Agent
+    headers = {"User-Agent": API_USER_AGENT, "Accept": "application/json"}
+    with (pool or HTTP_POOL).open(url, headers, timeout, deadline) as response:
+        return json.loads(response.read(MAX_JSON_BYTES).decode("utf-8"))
+
+
+class Provider:
+    """One entry of the provider data file (see link_providers.json)."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.hosts = spec["hosts"]
+        self.patterns = [re.compile(p) for p in spec.get("patterns", [])]
+        self.examples = spec.get("examples", [])
+
+    def match(self, key):
+        """Named groups of the first pattern matching "host/path?query"."""
+        for pattern in self.patterns:
+            match = pattern.match(key)
+            if match:
+                return match.groupdict()
+        return None
+
+    def fill(self, template, url, groups):
+        values = {k: quote(v or "", safe="") for k, v in groups.items()}
+        values["url"] = quote(url, safe="")
+        if "{canonical}" in template:
+            values["canonical"] = quote(self.canonical(url, groups), safe="")
+        return template.format(**values)
+
+    def canonical(self, url, groups):
+        template = self.spec.get("canonical")
+        return template.format(**groups) if template else url
+
+    def build(self, url, data):
+        """Map an endpoint's JSON onto preview metadata."""
+        metadata = {
+            "title": "",
+            "description": "",
             "image": "",
             "url": url,
             "request_url": url,
-            "site_name": "X (Twitter)",
-            "type": "article",
-            "favicon": "https://abs.twimg.com/favicons/twitter.3.ico",
-            "author": data.get("author_name", ""),
+            "site_name": self.spec.get("site_name", self.name),
+            "type": self.spec.get("type", "website"),
+            "favicon": self.spec.get("favicon", ""),
+            "author": "",
         }
-    except Exception as e:
-        return None
+        for field, path in self.spec.get("fields", {}).items():
+            value = data
+            for part in path.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if value:
+                metadata[field] = str(value)
+        for field, value in self.spec.get("defaults", {}).items():
+            if not metadata.get(field):
+                metadata[field] = value
+        for field in self.spec.get("strip_html", []):
+            metadata[field] = re.sub(r"<[^>]+>", "", metadata[field])
+        return metadata
 
 
-def is_youtube_url(url):
-    """Check if URL is a YouTube URL."""
-    return "youtube.com" in url or "youtu.be" in url
+class ProviderRegistry:
+    """
+    Routes URLs to providers by hostname.
 
+    Every registered host suffix lives in one dict, so a lookup walks the
+    URL's host labels (www.youtube.com, then youtube.com) rather than
+    testing each provider in turn. Only the matched provider's compiled
+    patterns run, against "suffix/path?query".
+    """
 
-def is_twitter_url(url):
-    """Check if URL is a Twitter/X URL."""
-    return "twitter.com" in url or "x.com" in url
+    def __init__(self, providers):
+        self.providers = providers
+        self.by_host = {}
+        for provider in providers:
+            for host in provider.hosts:
+                self.by_host[host] = provider
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        return cls([Provider(name, entry) for name, entry in spec.items()])
+
+    def match(self, url):
+        """Return (provider, groups) for url, or (None, None)."""
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            suffix = ".".join(labels[i:])
+            provider = self.by_host.get(suffix)
+            if provider:
+                key = suffix + (parsed.path or "/")
+                if parsed.query:
+                    key += "?" + parsed.query
+                groups = provider.match(key)
+                if groups is not None:
+                    return provider, groups
+                return None, None
+        return None, None
+
+
+PROVIDERS_PATH = os.path.join(os.path.dirname(__file__), "link_providers.json")
+PROVIDERS = ProviderRegistry.load(PROVIDERS_PATH)
+
+
+def fetch_provider_metadata(
+    provider, groups, url, timeout=5, pool=None, resolver=None, deadline=None
+):
+    """Fetch metadata from a provider's oEmbed/JSON endpoint."""
+    try:
+        data = fetch_json(
+            provider.fill(provider.spec["endpoint"], url, groups),
+            timeout,
+            pool,
+            deadline,
+        )
+        metadata = provider.build(url, data)
+        id_field = provider.spec.get("id_field")
+        if id_field:
+            metadata[id_field] = groups.get("id", "")
+
+        upgrade = provider.spec.get("image_upgrade")
+        image = metadata["image"]
+        if upgrade and upgrade[0] in image:
+            # e.g. YouTube's hqdefault -> maxresdefault (1280x720)
+            better = image.replace(upgrade[0], upgrade[1])
+            if resolver:
+                # Not every video has one; check rather than guess
+                resolved = resolver.resolve(
+                    {"image": [better, image], "favicon": [metadata["favicon"]]},
+                    deadline,
+                )
+                metadata.update(resolved)
+            else:
+                metadata["image"] = better
+        return metadata
+    except Exception as e:
+        return None
 
 
 class MetaTagParser(HTMLParser):
@@ -120,10 +741,19 @@ class MetaTagParser(HTMLParser):
         }
         self.in_title = False
         self.title_text = ""
+        # Set once </head> or <body> shows up; nothing after it is needed
+        self.head_done = False
         # Store all found favicons with their sizes for priority selection
         self.favicon_candidates = []
+        # Every og:image / twitter:image, for verification fallbacks
+        self.og_images = []
+        self.twitter_images = []
 
     def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            self.head_done = True
+            return
+
         attrs_dict = dict(attrs)
 
         # Handle title tag
@@ -179,6 +809,7 @@ class MetaTagParser(HTMLParser):
                     self.metadata["description"] = content
                 elif prop == "og:image":
                     self.metadata["image"] = content
+                    self.og_images.append(content)
                 elif prop == "og:url":
                     self.metadata["url"] = content
                 elif prop == "og:site_name":
@@ -194,8 +825,10 @@ class MetaTagParser(HTMLParser):
                     self.metadata["title"] = content
                 elif name == "twitter:description" and not self.metadata["description"]:
                     self.metadata["description"] = content
-                elif name == "twitter:image" and not self.metadata["image"]:
-                    self.metadata["image"] = content
+                elif name == "twitter:image":
+                    self.twitter_images.append(content)
+                    if not self.metadata["image"]:
+                        self.metadata["image"] = content
                 elif name == "description" and not self.metadata["description"]:
                     self.metadata["description"] = content
 
@@ -204,15 +837,19 @@ class MetaTagParser(HTMLParser):
             self.title_text += data
 
     def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_done = True
         if tag == "title":
             self.in_title = False
             if not self.metadata["title"]:
                 self.metadata["title"] = self.title_text.strip()
 
-    def get_best_favicon(self):
-        """Select the best favicon from collected candidates."""
-        if not self.favicon_candidates:
-            return self.metadata["favicon"]
+    def get_image_candidates(self):
+        """All declared preview images, Open Graph first."""
+        return self.og_images + self.twitter_images
+
+    def get_favicon_candidates(self):
+        """Declared favicon hrefs, best first."""
 
         # Sort by: priority (format) desc, then size desc (prefer larger icons)
         # Prefer sizes around 32-96px for good quality without being too large
@@ -229,21 +866,301 @@ class MetaTagParser(HTMLParser):
             return (priority, size_score)
 
         sorted_favicons = sorted(self.favicon_candidates, key=score, reverse=True)
-        return (
-            sorted_favicons[0]["href"] if sorted_favicons else self.metadata["favicon"]
+        return [fav["href"] for fav in sorted_favicons]
+
+    def get_best_favicon(self):
+        """Select the best favicon from collected candidates."""
+        candidates = self.get_favicon_candidates()
+        return candidates[0] if candidates else self.metadata["favicon"]
+
+
+def sniff_image(data):
+    """True if data starts like a raster image or an SVG document."""
+    if data.startswith(IMAGE_SIGNATURES):
+        return True
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return True
+    return b"<svg" in data[:512].lower()
+
+
+class MediaResolver:
+    """
+    Verifies candidate image and favicon URLs before they reach the UI.
+
+    Every candidate is probed concurrently with a ranged GET, and the first
+    one in ranking order that actually serves an image wins. With a
+    cache_dir, the winner is downloaded and shrunk to max_size with
+    ImageMagick, and a file:// URL to the local copy is returned instead.
+    The directory is pruned to MEDIA_CACHE_MAX_AGE and MEDIA_CACHE_MAX_BYTES
+    on start and every MEDIA_PRUNE_EVERY downloads.
+    """
+
+    def __init__(self, pool=None, cache_dir=None, max_size=256, timeout=5):
+        self.pool = pool
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.timeout = timeout
+        self.magick = shutil.which("magick")
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.lock = threading.Lock()
+        self.downloads = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune()
+
+    def prune(self, now=None):
+        """Delete cached media unused for too long, then the least recently
+        used files until the directory fits MEDIA_CACHE_MAX_BYTES."""
+        now = time.time() if now is None else now
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.is_file(follow_symlinks=False):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        total = 0
+        for mtime, size, path in entries:
+            total += size
+            # In-flight temporaries are young; crashed leftovers are not
+            if now - mtime > MEDIA_CACHE_MAX_AGE or (
+                total > MEDIA_CACHE_MAX_BYTES and not path.endswith(".tmp")
+            ):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def _stored(self):
+        """Count a download, pruning the cache every MEDIA_PRUNE_EVERY."""
+        with self.lock:
+            self.downloads += 1
+            due = self.downloads % MEDIA_PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def _deadline(self, deadline):
+        """The caller's deadline, capped by this resolver's own timeout."""
+        own = time.monotonic() + self.timeout
+        return own if deadline is None else min(deadline, own)
+
+    def probe(self, url, deadline=None):
+        if url.startswith("data:image/"):
+            return True
+        headers = {
+            "Range": f"bytes=0-{IMAGE_PROBE_BYTES - 1}",
+            "Accept": "image/*",
+        }
+        try:
+            with (self.pool or HTTP_POOL).open(
+                url, headers, self.timeout, self._deadline(deadline)
+            ) as response:
+                if response.headers.get_content_type().startswith("image/"):
+                    return True
+                # Plenty of favicons are served as octet-stream or text/plain
+                return sniff_image(response.read1(IMAGE_PROBE_BYTES))
+        except (urllib.error.URLError, OSError, http.client.HTTPException):
+            return False
+
+    def localize(self, url, deadline=None):
+        """Download and downscale url into the cache; the URL on failure."""
+        if not self.cache_dir or url.startswith("data:"):
+            return url
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        for ext in (".png", ".svg"):
+            cached = os.path.join(self.cache_dir, name + ext)
+            try:
+                # mtime doubles as last use for pruning
+                os.utime(cached)
+            except OSError:
+                continue
+            return "file://" + cached
+        deadline = self._deadline(deadline)
+        try:
+            with (self.pool or HTTP_POOL).open(
+                url, {}, self.timeout, deadline
+            ) as response:
+                data = response.read(MAX_MEDIA_BYTES)
+        except (urllib.error.URLError, OSError, ValueError, http.client.HTTPException):
+            return url
+
+        if not data.startswith(IMAGE_SIGNATURES) and b"<svg" in data[:512].lower():
+            # Already scalable and small; store as is
+            ext = ".svg"
+        elif self.magick:
+            ext = ".png"
+        else:
+            return url
+
+        # Unique temporaries: concurrent fetches of one URL must not share
+        target = os.path.join(self.cache_dir, name + ext)
+        fd, tmp = tempfile.mkstemp(
+            dir=self.cache_dir, prefix=f".{name}.", suffix=".tmp"
         )
+        try:
+            if ext == ".svg":
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+            else:
+                os.close(fd)
+                with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, suffix=".tmp"
+                ) as source:
+                    source.write(data)
+                    source.flush()
+                    subprocess.run(
+                        [
+                            self.magick,
+                            f"{source.name}[0]",
+                            "-thumbnail",
+                            f"{self.max_size}x{self.max_size}>",
+                            f"png:{tmp}",
+                        ],
+                        check=True,
+                        capture_output=True,
+                        timeout=max(0.001, deadline - time.monotonic()),
+                    )
+            os.replace(tmp, target)
+        except (OSError, subprocess.SubprocessError):
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return url
+        self._stored()
+        return "file://" + target
+
+    def resolve(self, groups, deadline=None):
+        """
+        Map {field: [candidate urls, best first]} to {field: winner}, where
+        the winner is "" if no candidate serves an image. Probes and
+        downloads share the caller's deadline when one is given.
+        """
+        probes = {}
+        for candidates in groups.values():
+            for url in candidates:
+                if url and url not in probes:
+                    probes[url] = self.executor.submit(self.probe, url, deadline)
+        resolved = {}
+        for field, candidates in groups.items():
+            winner = next(
+                (url for url in candidates if url and probes[url].result()), ""
+            )
+            resolved[field] = self.localize(winner, deadline) if winner else ""
+        return resolved
+
+
+def media_missing(metadata):
+    """True if a cached preview points at local media that has been removed."""
+    for field in ("image", "favicon"):
+        value = metadata.get(field) or ""
+        if value.startswith("file://") and not os.path.exists(value[7:]):
+            return True
+    return False
+
+
+def detect_charset(headers, head):
+    """
+    Pick the page encoding: BOM, then the Content-Type charset, then a
+    <meta charset> / http-equiv in the first KB. Unlabelled pages are
+    UTF-8 unless the first chunk doesn't decode as such, in which case
+    they get the web's legacy default, windows-1252.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    candidates = [headers.get_content_charset()]
+    match = META_CHARSET.search(head[:1024])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
 
 
-def fetch_preview(url, timeout=5):
+def sniff_html(head, content_type=""):
+    """
+    Judge a body by its first bytes: False for binary formats (magic
+    numbers, NUL bytes). A body declared as HTML passes otherwise, as
+    pages may open with <script>, <link> or bare text; for text/plain or
+    no Content-Type it must also open like markup.
+    """
+    for bom, encoding in BOMS:
+        if encoding.startswith("utf-16") and head.startswith(bom):
+            # UTF-16 pages carry NULs too; judge them by their decoded text
+            text = head[len(bom) : len(bom) + 2 * SNIFF_BYTES]
+            text = text[: len(text) // 2 * 2].decode(encoding, "replace")
+            head = text.encode("ascii", "replace")
+            break
+    if head.startswith(BINARY_SIGNATURES + IMAGE_SIGNATURES):
+        return False
+    if b"\x00" in head[:SNIFF_BYTES]:
+        return False
+    if content_type in HTML_TYPES:
+        return True
+    start = head.lstrip(b"\xef\xbb\xbf \t\r\n")[:SNIFF_BYTES].lower()
+    return start.startswith(HTML_MARKERS) or b"<html" in start or b"<head" in start
+
+
+def parse_head(response, first):
+    """
+    Stream the body into a MetaTagParser, starting from the already read
+    first chunk and stopping as soon as the head has been parsed or
+    MAX_HTML_BYTES have been read.
+    """
+    parser = MetaTagParser()
+    decoder = codecs.getincrementaldecoder(detect_charset(response.headers, first))(
+        errors="ignore"
+    )
+    chunk, total = first, 0
+    while chunk:
+        total += len(chunk)
+        text = decoder.decode(chunk)
+        for start in range(0, len(text), PARSE_SLICE):
+            parser.feed(text[start : start + PARSE_SLICE])
+            if parser.head_done:
+                break
+        if parser.head_done or total >= MAX_HTML_BYTES:
+            break
+        chunk = response.read1(min(HTML_CHUNK, MAX_HTML_BYTES - total))
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser
+
+
+def fetch_preview(
+    url, timeout=5, validators=None, pool=None, resolver=None, registry=None
+):
     """
     Fetch preview metadata for a given URL.
 
     Args:
         url: The URL to fetch metadata from
         timeout: Request timeout in seconds
+        validators: Optional dict of ETag/Last-Modified from an earlier
+            fetch. They are sent as conditional headers and the dict is
+            updated with the ones the server returns.
+        pool: ConnectionPool to fetch through, HTTP_POOL by default
+        resolver: Optional MediaResolver to verify (and localize) the
+            image and favicon
+        registry: ProviderRegistry for oEmbed sites, PROVIDERS by default
 
     Returns:
-        Dictionary with metadata or error information
+        Dictionary with metadata or error information, or
+        {"not_modified": True} when the server answered 304
     """
     try:
         # Validate URL
@@ -252,14 +1169,14 @@ def fetch_preview(url, timeout=5):
             return {"error": "Invalid URL"}
 
         # Check for special URL types that have oEmbed support
-        if is_youtube_url(url):
-            result = fetch_youtube_metadata(url, timeout)
-            if result:
-                return result
-            # If oEmbed fails, fall through to regular scraping
-
-        if is_twitter_url(url):
-            result = fetch_twitter_metadata(url, timeout)
+        # One budget for the whole lookup, oEmbed attempt included
+        deadline = time.monotonic() + timeout
+
+        provider, groups = (registry or PROVIDERS).match(url)
+        if provider:
+            result = fetch_provider_metadata(
+                provider, groups, url, timeout, pool, resolver, deadline
+            )
             if result:
                 return result
             # If oEmbed fails, fall through to regular scraping
@@ -270,28 +1187,41 @@ def fetch_preview(url, timeout=5):
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
             "Accept-Encoding": "identity",
-            "Connection": "close",
         }
-
-        req = urllib.request.Request(url, headers=headers)
-
-        # Fetch the page (urllib follows redirects automatically)
-        with urllib.request.urlopen(req, timeout=timeout) as response:
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        # Fetch the page (the pool follows redirects)
+        with (pool or HTTP_POOL).open(url, headers, timeout, deadline) as response:
             # Get the final URL after redirects
             final_url = response.geturl()
             final_parsed = urlparse(final_url)
 
-            # Only parse HTML content
+            # Only parse HTML content. The header decides what is worth
+            # reading at all; the first bytes decide whether it really is
+            # markup, so mislabelled downloads are dropped after one chunk.
             content_type = response.headers.get("Content-Type", "")
-            if "text/html" not in content_type:
+            content_type = content_type.split(";")[0].strip().lower()
+            if content_type not in SNIFFABLE_TYPES:
+                return {"error": "Not an HTML page"}
+            first = response.read1(HTML_CHUNK)
+            while first and len(first) < SNIFF_BYTES:
+                more = response.read1(HTML_CHUNK)
+                if not more:
+                    break
+                first += more
+            if not sniff_html(first, content_type):
                 return {"error": "Not an HTML page"}
 
-            # Read only first 500KB to avoid large downloads
-            html = response.read(500 * 1024).decode("utf-8", errors="ignore")
+            if validators is not None:
+                validators.clear()
+                validators["etag"] = response.headers.get("ETag")
+                validators["last_modified"] = response.headers.get("Last-Modified")
 
-        # Parse the HTML
-        parser = MetaTagParser()
-        parser.feed(html)
+            parser = parse_head(response, first)
 
         # Use the final URL after redirects for resolving relative URLs
         base_url = f"{final_parsed.scheme}://{final_parsed.netloc}"
@@ -315,6 +1245,20 @@ def fetch_preview(url, timeout=5):
             # Try common favicon locations before falling back to /favicon.ico
             metadata["favicon"] = f"{base_url}/favicon.ico"
 
+        if resolver:
+            favicons = parser.get_favicon_candidates() + [f"{base_url}/favicon.ico"]
+            metadata.update(
+                resolver.resolve(
+                    {
+                        "image": [
+                            urljoin(final_url, c) for c in parser.get_image_candidates()
+                        ],
+                        "favicon": [urljoin(final_url, c) for c in favicons],
+                    },
+                    deadline,
+                )
+            )
+
         if not metadata["url"]:
             metadata["url"] = url  # Keep original URL, not redirected
 
@@ -328,8 +1272,25 @@ def fetch_preview(url, timeout=5):
         return metadata
 
     except urllib.error.HTTPError as e:
-        return {"error": f"HTTP {e.code}", "url": url, "request_url": url}
+        if e.code == 304:
+            return {"not_modified": True, "url": url, "request_url": url}
+        result = {"error": f"HTTP {e.code}", "url": url, "request_url": url}
+        retry_after = parse_retry_after(e.headers.get("Retry-After"))
+        if e.code in (429, 503) and retry_after is not None:
+            result["retry_after"] = retry_after
+        return result
+    except TimeoutError:
+        return {"error": "Timed out", "url": url, "request_url": url}
+    except RateLimited as e:
+        return {
+            "error": "Rate limited",
+            "retry_after": e.retry_after,
+            "url": url,
+            "request_url": url,
+        }
     except urllib.error.URLError as e:
+        if isinstance(e.reason, TimeoutError) or e.reason == "timed out":
+            return {"error": "Timed out", "url": url, "request_url": url}
         return {
             "error": f"Connection failed: {e.reason}",
             "url": url,
@@ -339,15 +1300,724 @@ def fetch_preview(url, timeout=5):
         return {"error": f"Failed to parse: {str(e)}", "url": url, "request_url": url}
 
 
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url, registry=None):
+    """
+    Canonical form of a URL, used to key the cache and coalesce fetches.
+
+    Provider links collapse to the provider's canonical URL (youtu.be/ID
+    and youtube.com/watch?v=ID&t=10 are the same video). Other URLs get a
+    lowercase scheme and host, lose default ports, tracking parameters and
+    the fragment; the rest of the query is kept byte for byte.
+    """
+    provider, groups = (registry or PROVIDERS).match(url)
+    if provider and provider.spec.get("canonical"):
+        return provider.canonical(url, groups)
+
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    try:
+        host, port = (parsed.hostname or ""), parsed.port
+    except ValueError:
+        return urldefrag(url)[0]
+    if ":" in host:
+        host = f"[{host}]"
+    userinfo, _, _ = parsed.netloc.rpartition("@")
+    netloc = f"{userinfo}@{host}" if userinfo else host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    query = "&".join(
+        part
+        for part in parsed.query.split("&")
+        if part and not is_tracking_param(part.split("=", 1)[0])
+    )
+    path = parsed.path or ("/" if netloc else "")
+    return urlunparse((scheme, netloc, path, parsed.params, query, ""))
+
+
+class PreviewCache:
+    """
+    SQLite-backed preview cache shared by one-shot runs and the worker.
+
+    Each row stores the preview JSON, when it goes stale, and the HTTP
+    validators needed to revalidate it. Errors are cached too, with a
+    short TTL, so a dead link isn't refetched on every view; timeouts get
+    TIMEOUT_TTL and UNCACHED_ERRORS are not stored at all. Rows older
+    than CACHE_MAX_AGE, and the oldest beyond CACHE_MAX_ROWS, are pruned
+    on open and every CACHE_PRUNE_EVERY writes.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Worker threads share one connection behind a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS previews (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                is_error INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS previews_fetched_at ON previews (fetched_at)"
+        )
+        self.conn.commit()
+        self.puts = 0
+        with self.lock:
+            self.prune()
+
+    def prune(self, now=None):
+        """Drop rows past CACHE_MAX_AGE and the oldest beyond CACHE_MAX_ROWS."""
+        now = time.time() if now is None else now
+        self.conn.execute(
+            "DELETE FROM previews WHERE fetched_at < ?", (now - CACHE_MAX_AGE,)
+        )
+        self.conn.execute(
+            "DELETE FROM previews WHERE key IN ("
+            "SELECT key FROM previews ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+            (CACHE_MAX_ROWS,),
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data, is_error, etag, last_modified, expires_at "
+                "FROM previews WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if not row:
+            return None
+        data, is_error, etag, last_modified, expires_at = row
+        return {
+            "data": json.loads(data),
+            "is_error": bool(is_error),
+            "validators": {"etag": etag, "last_modified": last_modified},
+            "fresh": expires_at > time.time(),
+        }
+
+    def put(self, key, data, validators=None):
+        validators = validators or {}
+        is_error = "error" in data
+        if is_error and data["error"] in UNCACHED_ERRORS:
+            return
+        ttl = PREVIEW_TTL
+        if is_error and data["error"] == "Timed out":
+            ttl = TIMEOUT_TTL
+        elif is_error:
+            # Throttled lookups come back as soon as the server allows
+            ttl = min(ERROR_TTL, data.get("retry_after", ERROR_TTL))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO previews VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    json.dumps(data, ensure_ascii=False),
+                    int(is_error),
+                    validators.get("etag"),
+                    validators.get("last_modified"),
+                    now,
+                    now + ttl,
+                ),
+            )
+            self.conn.commit()
+            self.puts += 1
+            if self.puts % CACHE_PRUNE_EVERY == 0:
+                self.prune(now)
+
+    def touch(self, key):
+        """Mark a revalidated entry fresh again."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE previews SET fetched_at = ?, expires_at = ? WHERE key = ?",
+                (now, now + PREVIEW_TTL, key),
+            )
+            self.conn.commit()
+
+
+class Coalescer:
+    """Runs one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+
+    def run(self, key, fn):
+        with self.lock:
+            call = self.inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self.inflight[key] = {"done": threading.Event(), "result": None}
+        if not leader:
+            call["done"].wait()
+            return call["result"] or {"error": "Failed to fetch preview"}
+        try:
+            call["result"] = fn()
+            return call["result"]
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            call["done"].set()
+
+
+INFLIGHT = Coalescer()
+
+
+def get_preview(url, timeout=5, cache=None, resolver=None):
+    """
+    fetch_preview() behind the optional PreviewCache. Lookups are keyed
+    by normalize_url(), so equivalent links share one cache entry and one
+    in-flight fetch; each caller still gets its own URL as request_url,
+    and as url unless the page declared one (og:url).
+    """
+    key = normalize_url(url)
+    result = INFLIGHT.run(key, lambda: lookup_preview(key, timeout, cache, resolver))
+    result = dict(result)
+    if result.get("url") == key:
+        # Only the key was filled in; an og:url equal to it is the same link
+        result["url"] = url
+    result["request_url"] = url
+    return result
+
+
+def lookup_preview(key, timeout, cache, resolver):
+    """Serve the normalized URL key from cache, fetching it if needed."""
+    if cache is None:
+        return fetch_preview(key, timeout, resolver=resolver)
+
+    entry = cache.get(key)
+    if entry and entry["fresh"] and not media_missing(entry["data"]):
+        result = entry["data"]
+    else:
+        validators = {}
+        if entry and not entry["is_error"]:
+            validators = dict(entry["validators"])
+        result = fetch_preview(key, timeout, validators, resolver=resolver)
+        if result.get("not_modified"):
+            cache.touch(key)
+            result = entry["data"]
+        else:
+            cache.put(key, result, validators)
+    return result
+
+
+class PrefetchQueue:
+    """
+    Low-priority lookups that only warm the cache.
+
+    URLs are deduplicated by normalized key and served newest first; once
+    more than max_size are waiting the oldest are dropped. A single
+    background thread works through them, and only while no foreground
+    request is running.
+    """
+
+    def __init__(self, cache, resolver=None, timeout=5, max_size=64):
+        self.cache = cache
+        self.resolver = resolver
+        self.timeout = timeout
+        self.max_size = max_size
+        self.queue = OrderedDict()
+        self.foreground = 0
+        self.cond = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def push(self, url):
+        key = normalize_url(url)
+        with self.cond:
+            self.queue.pop(key, None)
+            self.queue[key] = url
+            while len(self.queue) > self.max_size:
+                self.queue.popitem(last=False)
+            self.cond.notify_all()
+
+    def cancel(self, url):
+        with self.cond:
+            self.queue.pop(normalize_url(url), None)
+
+    def clear(self):
+        with self.cond:
+            self.queue.clear()
+
+    def foreground_started(self):
+        with self.cond:
+            self.foreground += 1
+
+    def foreground_finished(self):
+        with self.cond:
+            self.foreground -= 1
+            self.cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue or self.foreground:
+                    self.cond.wait()
+                _, url = self.queue.popitem()
+            try:
+                get_preview(url, self.timeout, self.cache, self.resolver)
+            except Exception:
+                pass
+
+
+# Idle prefetch connections are dropped after this many seconds
+PREFETCH_CLIENT_TIMEOUT = 30
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, "ambxst", "link_preview.sock")
+
+
+def handle_prefetch_request(prefetch, request):
+    """Apply a {"prefetch"|"cancel": url} or {"cancel_all": true} request."""
+    if request.get("cancel_all"):
+        prefetch.clear()
+    elif request.get("cancel"):
+        prefetch.cancel(request["cancel"])
+    elif request.get("prefetch"):
+        prefetch.push(request["prefetch"])
+
+
+def listener_alive(path):
+    """True if something is accepting connections on the socket at path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(0.5)
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def listen_for_prefetch(path, prefetch):
+    """
+    Accept prefetch/cancel lines from other processes on a Unix socket,
+    each connection on its own thread. Returns None without touching the
+    socket if another worker is already listening on it.
+    """
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if listener_alive(path):
+        return None
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(16)
+
+    def handle(conn):
+        with conn, conn.makefile("r", encoding="utf-8") as lines:
+            try:
+                for line in lines:
+                    try:
+                        handle_prefetch_request(prefetch, json.loads(line))
+                    except (ValueError, AttributeError):
+                        continue
+            except OSError:
+                pass
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            # A client that connects and stalls must not block the others
+            conn.settimeout(PREFETCH_CLIENT_TIMEOUT)
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def send_prefetch_requests(path, requests):
+    """Hand requests to a running worker; silently a no-op if there is none."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(1)
+            conn.connect(path)
+            conn.sendall(
+                "".join(json.dumps(r) + "\n" for r in requests).encode("utf-8")
+            )
+    except OSError:
+        pass
+    return 0
+
+
+def run_worker(
+    concurrency=8, default_timeout=5, cache=None, resolver=None, listen=None
+):
+    """
+    Serve preview requests from stdin until EOF, fetching up to
+    `concurrency` URLs at once. Results are written in completion order.
+
+    With a cache, {"prefetch": url} and {"cancel": url} lines (on stdin or
+    on the `listen` socket) manage a PrefetchQueue that produces no output.
+    """
+    output_lock = threading.Lock()
+    prefetch = PrefetchQueue(cache, resolver, default_timeout) if cache else None
+    if prefetch and listen:
+        listen_for_prefetch(listen, prefetch)
+
+    def emit(result):
+        line = json.dumps(result, ensure_ascii=False)
+        with output_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def handle(url, timeout):
+        try:
+            result = get_preview(url, timeout, cache, resolver)
+        except Exception as e:
+            result = {"error": f"Failed to parse: {str(e)}"}
+        finally:
+            if prefetch:
+                prefetch.foreground_finished()
+        # Responses arrive out of order, so every one must carry its key
+        result["request_url"] = url
+        emit(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if "url" not in request:
+                    if prefetch:
+                        handle_prefetch_request(prefetch, request)
+                    continue
+                url = request["url"]
+                timeout = float(request.get("timeout", default_timeout))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                emit({"error": "Invalid request", "request_url": line})
+                continue
+            if prefetch:
+                # Counted from submission so queued requests also hold prefetch off
+                prefetch.foreground_started()
+            pool.submit(handle, url, timeout)
+
+
+BENCHMARK_PAGE = (
+    b"<!doctype html><html><head><title>Benchmark</title>"
+    b'<meta property="og:title" content="Benchmark page">'
+    b'<meta property="og:description" content="Served locally">'
+    b'<link rel="icon" href="/favicon.png" sizes="32x32">'
+    b"</head><body>" + b"<p>filler</p>" * 500 + b"</body></html>"
+)
+
+
+class BenchmarkHandler(http.server.BaseHTTPRequestHandler):
+    """Keep-alive handler serving BENCHMARK_PAGE for every path."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BENCHMARK_PAGE)))
+        self.end_headers()
+        self.wfile.write(BENCHMARK_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_benchmark_server(cert_dir=None):
+    """Serve BENCHMARK_PAGE on a free local port. Returns (server, base_url, context)."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), BenchmarkHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    scheme, client_context = "http", None
+    if cert_dir:
+        cert = os.path.join(cert_dir, "cert.pem")
+        key = os.path.join(cert_dir, "key.pem")
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "rsa:2048",
+                "-nodes",
+                "-days",
+                "1",
+                "-subj",
+                "/CN=127.0.0.1",
+                "-addext",
+                "subjectAltName=IP:127.0.0.1",
+                "-keyout",
+                key,
+                "-out",
+                cert,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert, key)
+        server.socket = server_context.wrap_socket(server.socket, server_side=True)
+        client_context = ssl.create_default_context(cafile=cert)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"{scheme}://127.0.0.1:{server.server_address[1]}"
+    return server, base_url, client_context
+
+
+# Superset of the fields the built-in providers read
+MOCK_OEMBED = {
+    "title": "Mock title",
+    "author_name": "Mock author",
+    "thumbnail_url": "https://i.ytimg.com/vi/mock/hqdefault.jpg",
+    "html": "<blockquote><p>Mock <a href='#'>post</a></p></blockquote>",
+    "full_name": "owner/repo",
+    "description": "Mock description",
+    "owner": {"login": "owner", "avatar_url": "https://example.com/avatar.png"},
+}
+
+# Hosts the old substring checks mistook for providers
+NON_PROVIDER_URLS = [
+    "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+    "https://box.com/x.com/status/20",
+    "https://example.com/?u=https://youtu.be/dQw4w9WgXcQ",
+]
+
+
+class MockOEmbedHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every request with MOCK_OEMBED."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps(MOCK_OEMBED).encode("utf-8")
+        self.server.paths.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_providers(registry, rounds=10000):
+    """
+    Route every provider's examples and fetch them from a local mock
+    oEmbed server. Prints a report; returns 1 if anything failed.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MockOEmbedHandler)
+    server.daemon_threads = True
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mock_host = f"127.0.0.1:{server.server_address[1]}"
+    # Unthrottled: every example hits the same mock host
+    pool = ConnectionPool()
+
+    report = {"providers": {}, "false_matches": []}
+    failed = False
+    for provider in registry.providers:
+        endpoint = urlparse(provider.spec["endpoint"])
+        mocked = Provider(
+            provider.name,
+            dict(
+                provider.spec,
+                endpoint=endpoint._replace(scheme="http", netloc=mock_host).geturl(),
+            ),
+        )
+        results = {}
+        for example in provider.examples:
+            matched, groups = registry.match(example)
+            if matched is not provider:
+                results[example] = "not routed"
+                continue
+            metadata = fetch_provider_metadata(mocked, groups, example, 5, pool)
+            missing = [
+                field
+                for field in provider.spec.get("fields", {})
+                if not (metadata or {}).get(field)
+            ]
+            requested = server.paths[-1] if server.paths else ""
+            results[example] = {"groups": groups, "missing": missing, "path": requested}
+            if metadata is None or missing:
+                results[example]["error"] = True
+        failed = failed or any(
+            not isinstance(r, dict) or r.get("error") for r in results.values()
+        )
+        report["providers"][provider.name] = results
+
+    for url in NON_PROVIDER_URLS:
+        if registry.match(url)[0] is not None:
+            report["false_matches"].append(url)
+            failed = True
+
+    urls = [e for p in registry.providers for e in p.examples] + NON_PROVIDER_URLS
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url in urls:
+            registry.match(url)
+    elapsed = time.perf_counter() - start
+    report["route_us"] = round(elapsed * 1e6 / (rounds * len(urls)), 3)
+    server.shutdown()
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+def run_benchmark(count, tls=False, concurrency=8):
+    """Measure previews/sec against a local server with and without pooling."""
+    with tempfile.TemporaryDirectory() as cert_dir:
+        server, base_url, context = start_benchmark_server(cert_dir if tls else None)
+        report = {"previews": count, "url": base_url, "runs": {}}
+        for reuse in (False, True):
+            for workers in (1, concurrency):
+                pool = ConnectionPool(reuse=reuse, context=context)
+                urls = [f"{base_url}/page/{i}" for i in range(count)]
+                connections = server.connections
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(
+                        executor.map(lambda u: fetch_preview(u, 5, None, pool), urls)
+                    )
+                elapsed = time.perf_counter() - start
+                pool.close()
+                name = f"{'pooled' if reuse else 'unpooled'}_x{workers}"
+                report["runs"][name] = {
+                    "previews_per_sec": round(count / elapsed, 1),
+                    "ms_per_preview": round(elapsed * 1000 / count, 3),
+                    "connections": server.connections - connections,
+                    "errors": sum(1 for r in results if "error" in r),
+                }
+        server.shutdown()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Fetch link preview metadata")
+    parser.add_argument("--cache", help="SQLite database to cache previews in")
+    parser.add_argument(
+        "--worker",
+        nargs="?",
+        type=int,
+        const=8,
+        metavar="CONCURRENCY",
+        help="serve JSON-lines requests from stdin",
+    )
+    parser.add_argument(
+        "--socket",
+        default=default_socket_path(),
+        help="prefetch socket of the worker (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--listen",
+        action="store_true",
+        help="in worker mode, also accept prefetch requests on --socket",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="append",
+        metavar="URL",
+        help="queue URL for background prefetch in the running worker",
+    )
+    parser.add_argument(
+        "--cancel",
+        action="append",
+        metavar="URL",
+        help="drop URL from the running worker's prefetch queue",
+    )
+    parser.add_argument(
+        "--verify-media",
+        action="store_true",
+        help="check image and favicon candidates and keep the first that loads",
+    )
+    parser.add_argument(
+        "--media-cache",
+        metavar="DIR",
+        help="also download and downscale verified media into DIR",
+    )
+    parser.add_argument(
+        "--providers",
+        default=PROVIDERS_PATH,
+        metavar="FILE",
+        help="provider registry to use instead of link_providers.json",
+    )
+    parser.add_argument(
+        "--check-providers",
+        action="store_true",
+        help="route and fetch every provider example against a mock oEmbed server",
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="fetch N previews from a local server with and without pooling",
+    )
+    parser.add_argument(
+        "--tls", action="store_true", help="serve the benchmark over HTTPS"
+    )
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("timeout", nargs="?", type=int, default=5)
+    options = parser.parse_args()
+
+    global PROVIDERS
+    if options.providers != PROVIDERS_PATH:
+        PROVIDERS = ProviderRegistry.load(options.providers)
+
+    if options.check_providers:
+        sys.exit(check_providers(PROVIDERS))
+
+    if options.benchmark:
+        sys.exit(run_benchmark(max(1, options.benchmark), options.tls))
+
+    if options.prefetch or options.cancel:
+        requests = [{"prefetch": url} for url in options.prefetch or []]
+        requests += [{"cancel": url} for url in options.cancel or []]
+        sys.exit(send_prefetch_requests(options.socket, requests))
+
+    cache = PreviewCache(options.cache) if options.cache else None
+    resolver = None
+    if options.verify_media or options.media_cache:
+        resolver = MediaResolver(cache_dir=options.media_cache)
+
+    if options.worker is not None:
+        run_worker(
+            max(1, options.worker),
+            cache=cache,
+            resolver=resolver,
+            listen=options.socket if options.listen else None,
+        )
+        return
+
+    if not options.url:
         print(json.dumps({"error": "No URL provided"}))
         sys.exit(1)
 
-    url = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-
-    result = fetch_preview(url, timeout)
+    result = get_preview(options.url, options.timeout, cache, resolver)
     print(json.dumps(result, ensure_ascii=False))
 
 
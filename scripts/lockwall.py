@@ -2,25 +2,275 @@
 """
 Lockscreen Wallpaper Frame Extractor for Ambxst
 Extracts first frame from video/GIF wallpapers for lockscreen background.
-Only processes video and GIF files - skips regular images.
+Static images are used directly unless display-sized variants are requested,
+in which case they are downscaled so lock-time decode cost stays small.
+
+Extracted frames are kept in a bounded LRU cache keyed by the source path,
+size and mtime, so switching back to a recent wallpaper is a cache hit.
+Frames are published as lockscreen/<md5 of the source path>[variant].jpg,
+the name Wallpaper.qml derives, so same-named wallpapers in different
+folders do not overwrite each other.
+Optionally renders display-sized and pre-blurred variants per output so the
+lockscreen does not have to scale and blur a full-size frame at lock time.
+With --batch, a whole wallpaper directory is rendered ahead of time at idle
+priority so switching wallpapers never waits on frame extraction.
+With --frame best, videos use a representative frame (see frameselect.py)
+instead of frame 0, which is often a black fade-in.
 """
 
+import argparse
+import fcntl
+import hashlib
+import json
 import os
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from frameselect import select_frame_time
 
 # Supported extensions for processing
 VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".avi", ".mkv"}
 GIF_EXTENSIONS = {".gif"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp"}
+
+# Frame selection modes: frame 0, or the best scored keyframe (videos only)
+FRAME_MODES = ("first", "best")
+
+# Frame cache settings
+MAX_CACHED_FRAMES = 16
+CACHE_INDEX = "index.json"
+CACHE_LOCK = ".lock"
+# Unindexed frames younger than this may belong to a render in progress
+# elsewhere (ffmpeg runs outside the lock, for up to 30s), so prune keeps them
+FRAME_GRACE = 120
+
+
+def tmp_suffix() -> str:
+    """Per process and thread, so concurrent batch workers never share a temporary."""
+    return f"{os.getpid()}.{threading.get_ident()}"
+
+
+def published_name(source: Path, variant: str = "") -> str:
+    """File name a source's frame is published under; Wallpaper.qml mirrors it."""
+    digest = hashlib.md5(os.fsencode(os.path.abspath(source))).hexdigest()
+    return f"{digest}{variant}.jpg"
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write text to path via a temporary file and rename."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
+def publish_file(source: Path, target: Path) -> None:
+    """Atomically expose source at target, hardlinking when possible."""
+    if target.exists() and os.path.samefile(source, target):
+        return
+    tmp_path = target.with_name(f".{target.name}.{tmp_suffix()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class FrameCache:
+    """LRU cache of extracted frames stored under <lockscreen>/frames."""
+
+    def __init__(self, root: Path, capacity: int = MAX_CACHED_FRAMES):
+        self.root = root
+        self.frames_dir = root / "frames"
+        self.index_path = root / CACHE_INDEX
+        self.capacity = max(1, capacity)
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def source_key(source: Path, frame_mode: str = "first") -> str:
+        """Cache key for a source file: resolved path, size, mtime and frame mode."""
+        stat = source.stat()
+        identity = f"{source.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        if frame_mode != "first":
+            identity += f"\0{frame_mode}"
+        return hashlib.sha1(identity.encode()).hexdigest()[:24]
+
+    def frame_path(self, key: str, variant: str = "") -> Path:
+        return self.frames_dir / f"{key}{variant}.jpg"
+
+    @contextmanager
+    def locked(self) -> Iterator[Dict[str, dict]]:
+        """Hold the cache lock and yield the index, saving it on exit."""
+        with open(self.root / CACHE_LOCK, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            yield entries
+            atomic_write_text(self.index_path, json.dumps(entries, indent=1))
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            entries = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return {
+            key: entry
+            for key, entry in entries.items()
+            if isinstance(entry, dict) and isinstance(entry.get("variants"), list)
+        }
+
+    def lookup(self, entries: Dict[str, dict], key: str) -> List[str]:
+        """Return the cached variants for key and mark it most recently used."""
+        entry = entries.get(key)
+        if entry is None:
+            return []
+        variants = [
+            variant
+            for variant in entry.get("variants", [])
+            if self.frame_path(key, variant).exists()
+        ]
+        entry["used"] = time.time()
+        return variants
+
+    def store(
+        self,
+        entries: Dict[str, dict],
+        key: str,
+        source: Path,
+        published: Dict[str, Path],
+    ) -> None:
+        """Record freshly written variants and evict least recently used ones."""
+        source_path = str(source.resolve())
+        # The source changed on disk: frames rendered from the old version are stale
+        for stale_key in [
+            k for k, e in entries.items() if k != key and e.get("source") == source_path
+        ]:
+            for variant in entries.pop(stale_key).get("variants", []):
+                self.frame_path(stale_key, variant).unlink(missing_ok=True)
+
+        entry = entries.setdefault(key, {"variants": [], "published": []})
+        entry["source"] = source_path
+        entry["variants"] = sorted(set(entry["variants"]) | set(published))
+        # Names published for this source under an older scheme are dropped
+        prefixes = {path.name.split(".", 1)[0] for path in published.values()}
+        entry["published"] = sorted(
+            {name for name in entry["published"] if name.split(".", 1)[0] in prefixes}
+            | {path.name for path in published.values()}
+        )
+        entry["used"] = time.time()
+        self.evict(entries)
+
+    def evict(self, entries: Dict[str, dict]) -> None:
+        """Drop least recently used frames beyond capacity."""
+        while len(entries) > self.capacity:
+            key = min(entries, key=lambda k: entries[k].get("used", 0))
+            entry = entries.pop(key)
+            for variant in entry.get("variants", []):
+                self.frame_path(key, variant).unlink(missing_ok=True)
+            print(f"✓ Evicted cached frame: {Path(entry.get('source', key)).name}")
+        self.prune(entries)
+
+    def prune(self, entries: Dict[str, dict]) -> None:
+        """Remove published files and frames no longer referenced by the index."""
+        published = {
+            name for entry in entries.values() for name in entry.get("published", [])
+        }
+        for file in self.root.glob("*"):
+            if file.is_file() and not file.name.startswith("."):
+                if file.name != CACHE_INDEX and file.name not in published:
+                    file.unlink(missing_ok=True)
+                    print(f"✓ Removed old file: {file.name}")
+        cutoff = time.time() - FRAME_GRACE
+        for file in self.frames_dir.glob("[!.]*.jpg"):
+            if file.name.split(".", 1)[0] in entries:
+                continue
+            try:
+                if file.stat().st_mtime < cutoff:
+                    file.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    """Parse a WIDTHxHEIGHT display size."""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    return width, height
+
+
+def variant_suffix(size: Optional[Tuple[int, int]], blur: int) -> str:
+    """File suffix for a rendered variant; the full frame has none."""
+    suffix = f".{size[0]}x{size[1]}" if size else ""
+    return suffix + (f".blur{blur}" if blur else "")
+
+
+def build_filter_graph(
+    variants: Dict[str, Tuple[Optional[Tuple[int, int]], int]],
+) -> Tuple[str, List[str]]:
+    """Build one filter graph rendering every variant from the first frame.
+
+    The frame is decoded once, scaled once per display size (cropped the
+    way the lockscreen fills the screen) and blurred from the scaled copy.
+    Returns the graph and the output label of each variant, in order.
+    """
+    groups: Dict[Optional[Tuple[int, int]], List[str]] = {}
+    for suffix, (size, _) in variants.items():
+        groups.setdefault(size, []).append(suffix)
+
+    heads = "".join(f"[g{i}]" for i in range(len(groups)))
+    chains = [f"[0:v]trim=end_frame=1,split={len(groups)}{heads}"]
+    labels = {}
+    for i, (size, suffixes) in enumerate(groups.items()):
+        base = "null"
+        if size:
+            width, height = size
+            base = (
+                f"scale={width}:{height}:force_original_aspect_ratio=increase"
+                f":flags=lanczos,crop={width}:{height}"
+            )
+        outs = "".join(f"[g{i}v{k}]" for k in range(len(suffixes)))
+        chains.append(f"[g{i}]{base},split={len(suffixes)}{outs}")
+        for k, suffix in enumerate(suffixes):
+            blur = variants[suffix][1]
+            # MultiEffect's blurMax is roughly two gaussian sigmas wide
+            effect = f"gblur=sigma={blur / 2:g}" if blur else "null"
+            labels[suffix] = f"o{i}_{k}"
+            chains.append(f"[g{i}v{k}]{effect}[{labels[suffix]}]")
+    return ";".join(chains), [labels[suffix] for suffix in variants]
 
 
 class LockscreenWallpaperGenerator:
-    def __init__(self, wallpaper_path: str, data_path: str):
+    def __init__(
+        self,
+        wallpaper_path: str,
+        data_path: str,
+        sizes: Sequence[Tuple[int, int]] = (),
+        blur: int = 0,
+        cache_size: int = MAX_CACHED_FRAMES,
+        verbose: bool = True,
+        frame_mode: str = "first",
+    ):
         self.current_wallpaper = Path(wallpaper_path).expanduser()
         self.data_path = Path(data_path)
+        self.sizes = list(dict.fromkeys(sizes))
+        self.blur = max(0, blur)
+        self.cache_size = cache_size
+        self.verbose = verbose
+        self.frame_mode = frame_mode
         self.lockscreen_dir: Optional[Path] = None
+        self.cache: Optional[FrameCache] = None
 
     def validate_wallpaper(self) -> bool:
         """Validate wallpaper exists."""
@@ -31,65 +281,113 @@ class LockscreenWallpaperGenerator:
         # Setup lockscreen directory in QuickShell data path
         self.lockscreen_dir = self.data_path / "lockscreen"
         self.lockscreen_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = FrameCache(self.lockscreen_dir, self.cache_size)
 
-        print(f"✓ Current wallpaper: {self.current_wallpaper.name}")
-        print(f"✓ Lockscreen cache: {self.lockscreen_dir}")
+        self.log(f"✓ Current wallpaper: {self.current_wallpaper.name}")
+        self.log(f"✓ Lockscreen cache: {self.lockscreen_dir}")
         return True
 
+    def log(self, message: str) -> None:
+        """Print progress unless running quietly as part of a batch."""
+        if self.verbose:
+            print(message)
+
     def is_video_or_gif(self) -> bool:
         """Check if current wallpaper is a video or GIF."""
         ext = self.current_wallpaper.suffix.lower()
         return ext in VIDEO_EXTENSIONS or ext in GIF_EXTENSIONS
 
-    def get_output_path(self) -> Path:
-        """Get output path for lockscreen wallpaper."""
-        if self.lockscreen_dir is None:
-            raise RuntimeError("Lockscreen directory not initialized")
+    def is_video(self) -> bool:
+        """Check if current wallpaper is a video."""
+        return self.current_wallpaper.suffix.lower() in VIDEO_EXTENSIONS
+
+    def is_static_image(self) -> bool:
+        """Check if current wallpaper is a regular image."""
+        return self.current_wallpaper.suffix.lower() in IMAGE_EXTENSIONS
+
+    def needs_processing(self) -> bool:
+        """Videos/GIFs always need a frame; images only need sized variants."""
+        return self.is_video_or_gif() or (self.is_static_image() and bool(self.sizes))
+
+    def get_variants(self) -> Dict[str, Tuple[Optional[Tuple[int, int]], int]]:
+        """Variants to render: the full frame, then sharp and blurred per size.
+
+        Static images are their own full frame, so only sized variants apply.
+        """
+        variants: Dict[str, Tuple[Optional[Tuple[int, int]], int]] = {}
+        if not self.is_static_image():
+            variants[""] = (None, 0)
+        for size in self.sizes:
+            variants[variant_suffix(size, 0)] = (size, 0)
+            if self.blur:
+                variants[variant_suffix(size, self.blur)] = (size, self.blur)
+        return variants
 
-        # Create output filename: original_name.extension.jpg
-        output_name = self.current_wallpaper.name + ".jpg"
-        return self.lockscreen_dir / output_name
+    def get_frame_time(self) -> Optional[float]:
+        """Timestamp of the frame to render; None means the first frame."""
+        if self.frame_mode != "best" or not self.is_video():
+            return None
+        start = select_frame_time(self.current_wallpaper, self.data_path)
+        if start is not None:
+            self.log(f"✓ Representative frame at {start:.2f}s")
+        return start
 
-    def clean_lockscreen_dir(self) -> None:
-        """Remove all existing files in lockscreen directory."""
+    def get_output_path(self, variant: str = "") -> Path:
+        """Get output path for lockscreen wallpaper."""
         if self.lockscreen_dir is None:
-            return
+            raise RuntimeError("Lockscreen directory not initialized")
 
-        try:
-            for file in self.lockscreen_dir.glob("*"):
-                if file.is_file():
-                    file.unlink()
-                    print(f"✓ Removed old file: {file.name}")
-        except Exception as e:
-            print(f"WARNING: Failed to clean directory: {e}")
+        # <md5 of the source path>[.WxH[.blurR]].jpg
+        return self.lockscreen_dir / published_name(self.current_wallpaper, variant)
 
-    def extract_first_frame(self) -> Tuple[bool, str]:
-        """Extract first frame from video/GIF using FFmpeg."""
-        output_path = self.get_output_path()
+    def extract_frames(
+        self,
+        outputs: Dict[str, Path],
+        variants: Dict[str, Tuple[Optional[Tuple[int, int]], int]],
+    ) -> Tuple[bool, str]:
+        """Render the chosen frame of the wallpaper into every requested variant."""
+        tmp_paths = {
+            suffix: path.with_name(f".{path.stem}.{tmp_suffix()}.jpg")
+            for suffix, path in outputs.items()
+        }
+        graph, labels = build_filter_graph(
+            {suffix: variants[suffix] for suffix in outputs}
+        )
 
         try:
-            # FFmpeg command to extract first frame
-            cmd = [
-                "ffmpeg",
-                "-y",
+            # FFmpeg command decoding the chosen frame once for all variants
+            cmd = ["ffmpeg", "-y"]
+            start = self.get_frame_time()
+            if start:
+                cmd += ["-ss", f"{start:.3f}"]  # Input seek to the chosen keyframe
+            cmd += [
                 "-i",
                 str(self.current_wallpaper),
-                "-vframes",
-                "1",  # Extract only first frame
-                "-q:v",
-                "2",  # High quality
-                "-f",
-                "image2",  # Force image format
-                str(output_path),
+                "-filter_complex",
+                graph,
             ]
+            for label, tmp_path in zip(labels, tmp_paths.values()):
+                cmd += [
+                    "-map",
+                    f"[{label}]",
+                    "-frames:v",
+                    "1",  # Extract only first frame
+                    "-q:v",
+                    "2",  # High quality
+                    "-f",
+                    "image2",  # Force image format
+                    str(tmp_path),
+                ]
 
-            print(f"⚡ Extracting first frame...")
+            self.log(f"⚡ Rendering {len(outputs)} variant(s)...")
 
             # Run FFmpeg
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
 
-            if result.returncode == 0 and output_path.exists():
-                print(f"✅ Frame saved: {output_path.name}")
+            if result.returncode == 0 and all(p.exists() for p in tmp_paths.values()):
+                for suffix, tmp_path in tmp_paths.items():
+                    os.replace(tmp_path, outputs[suffix])
+                self.log(f"✅ Frame rendered: {self.current_wallpaper.name}")
                 return True, "Success"
             else:
                 error_msg = result.stderr.strip() if result.stderr else "Unknown error"
@@ -99,6 +397,46 @@ class LockscreenWallpaperGenerator:
             return False, "Timeout"
         except Exception as e:
             return False, str(e)
+        finally:
+            for tmp_path in tmp_paths.values():
+                tmp_path.unlink(missing_ok=True)
+
+    def generate_frame(self) -> Tuple[bool, str]:
+        """Serve every variant from cache, rendering only the missing ones."""
+        if self.cache is None:
+            raise RuntimeError("Lockscreen cache not initialized")
+
+        variants = self.get_variants()
+        key = self.cache.source_key(self.current_wallpaper, self.frame_mode)
+        published = {suffix: self.get_output_path(suffix) for suffix in variants}
+
+        with self.cache.locked() as entries:
+            cached = self.cache.lookup(entries, key)
+            missing = {
+                suffix: self.cache.frame_path(key, suffix)
+                for suffix in variants
+                if suffix not in cached
+            }
+            if not missing:
+                for suffix, output_path in published.items():
+                    publish_file(self.cache.frame_path(key, suffix), output_path)
+                self.log(f"⚡ Cache hit: {self.current_wallpaper.name}")
+                return True, "Cached"
+
+        # Extract outside the lock so other runs are not blocked on ffmpeg
+        success, message = self.extract_frames(missing, variants)
+        if not success:
+            return False, message
+
+        with self.cache.locked() as entries:
+            try:
+                for suffix, output_path in published.items():
+                    publish_file(self.cache.frame_path(key, suffix), output_path)
+            except OSError as e:
+                # One wallpaper failing must not abort a whole batch
+                return False, f"Cannot publish frame: {e}"
+            self.cache.store(entries, key, self.current_wallpaper, published)
+        return True, message
 
     def run(self) -> int:
         """Main execution function."""
@@ -109,18 +447,18 @@ class LockscreenWallpaperGenerator:
         if not self.validate_wallpaper():
             return 1
 
-        # Check if wallpaper is video or GIF
-        if not self.is_video_or_gif():
-            ext = self.current_wallpaper.suffix.lower()
-            print(f"ℹ️  Wallpaper is a regular image ({ext})")
-            print("ℹ️  No processing needed - use wallpaper directly")
+        # Regular images only need processing for display-sized variants
+        ext = self.current_wallpaper.suffix.lower()
+        if not self.needs_processing():
+            if self.is_static_image():
+                print(f"ℹ️  Wallpaper is a regular image ({ext})")
+                print("ℹ️  No processing needed - use wallpaper directly")
+            else:
+                print(f"ℹ️  Unsupported wallpaper type ({ext}) - skipping")
             return 0
 
-        # Clean existing files
-        self.clean_lockscreen_dir()
-
-        # Extract first frame
-        success, message = self.extract_first_frame()
+        # Reuse a cached frame or extract the first frame
+        success, message = self.generate_frame()
 
         if success:
             print("🎉 Lockscreen wallpaper ready!")
@@ -130,18 +468,178 @@ class LockscreenWallpaperGenerator:
             return 1
 
 
+def collect_sources(source: Path) -> List[Path]:
+    """Wallpapers in a directory (recursively, skipping hidden) or a list file."""
+    if source.is_dir():
+        files = [
+            path
+            for path in source.rglob("*")
+            if path.is_file()
+            and not any(part.startswith(".") for part in path.relative_to(source).parts)
+        ]
+    else:
+        files = [
+            Path(line.strip()).expanduser()
+            for line in source.read_text().splitlines()
+            if line.strip()
+        ]
+
+    supported = VIDEO_EXTENSIONS | GIF_EXTENSIONS | IMAGE_EXTENSIONS
+    return sorted(path for path in files if path.suffix.lower() in supported)
+
+
+def lower_priority() -> None:
+    """Drop to idle CPU and I/O priority; worker threads and ffmpeg inherit it."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+    if shutil.which("ionice"):
+        subprocess.run(
+            ["ionice", "-c", "3", "-p", str(os.getpid())], capture_output=True
+        )
+
+
+def run_batch(
+    source: Path,
+    data_path: str,
+    sizes: Sequence[Tuple[int, int]],
+    blur: int,
+    jobs: int,
+    cache_size: int,
+    frame_mode: str = "first",
+) -> int:
+    """Render lockscreen frames for every wallpaper under source in parallel."""
+    print("🔒 Ambxst Lockscreen Wallpaper Generator (batch)")
+    print("=" * 40)
+
+    try:
+        sources = collect_sources(source)
+    except OSError as e:
+        print(f"ERROR: Cannot read wallpaper list: {e}")
+        return 1
+
+    # The whole set must fit in the cache or the batch would evict itself
+    cache_size = max(cache_size, len(sources))
+    generators = [
+        LockscreenWallpaperGenerator(
+            str(path),
+            data_path,
+            sizes,
+            blur,
+            cache_size,
+            verbose=False,
+            frame_mode=frame_mode,
+        )
+        for path in sources
+    ]
+    generators = [g for g in generators if g.needs_processing()]
+    generators = [g for g in generators if g.validate_wallpaper()]
+    if not generators:
+        print("ℹ️  Nothing to process")
+        return 0
+
+    lower_priority()
+    print(f"⚡ Processing {len(generators)} wallpaper(s) with {jobs} worker(s)...")
+
+    counts = {"rendered": 0, "cached": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(lambda g: g.generate_frame(), generators)
+        for generator, (success, message) in zip(generators, results):
+            name = generator.current_wallpaper.name
+            if not success:
+                counts["failed"] += 1
+                print(f"❌ {name}: {message.splitlines()[-1] if message else message}")
+            elif message == "Cached":
+                counts["cached"] += 1
+            else:
+                counts["rendered"] += 1
+                print(f"✅ {name}")
+
+    print(
+        f"🎉 Batch done: {counts['rendered']} rendered, "
+        f"{counts['cached']} cached, {counts['failed']} failed"
+    )
+    return 1 if counts["failed"] else 0
+
+
 def main():
     """Entry point."""
-    if len(sys.argv) != 3:
-        print("Usage: python3 lockscreen_wallpaper.py <wallpaper_path> <data_path>")
-        print(
-            "Example: python3 lockscreen_wallpaper.py /path/to/video.mp4 ~/.local/share/quickshell"
+    parser = argparse.ArgumentParser(
+        description="Render lockscreen frames and display-sized variants",
+        epilog="Example: lockwall.py /path/to/video.mp4 ~/.cache/quickshell "
+        "--size 2560x1440 --blur 64",
+    )
+    parser.add_argument(
+        "wallpaper_path",
+        help="Wallpaper file, or with --batch a directory or file listing paths",
+    )
+    parser.add_argument("data_path", help="Directory holding the lockscreen cache")
+    parser.add_argument(
+        "--size",
+        action="append",
+        type=parse_size,
+        default=[],
+        metavar="WxH",
+        help="Also render a variant sized for this display (repeatable)",
+    )
+    parser.add_argument(
+        "--blur",
+        type=int,
+        default=0,
+        metavar="RADIUS",
+        help="Also render blurred display variants at this blur radius",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=MAX_CACHED_FRAMES,
+        metavar="N",
+        help=f"Wallpapers kept in the frame cache (default: {MAX_CACHED_FRAMES})",
+    )
+    parser.add_argument(
+        "--frame",
+        choices=FRAME_MODES,
+        default="first",
+        help="Video frame to use: the first one or the best scored keyframe",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Render every wallpaper ahead of time at idle priority",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        metavar="N",
+        help="Parallel ffmpeg workers in batch mode (default: half the CPUs)",
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        return run_batch(
+            Path(args.wallpaper_path).expanduser(),
+            args.data_path,
+            args.size,
+            args.blur,
+            max(1, args.jobs),
+            args.cache_size,
+            args.frame,
         )
-        return 1
 
-    wallpaper_path = sys.argv[1]
-    data_path = sys.argv[2]
-    generator = LockscreenWallpaperGenerator(wallpaper_path, data_path)
+    generator = LockscreenWallpaperGenerator(
+        args.wallpaper_path,
+        args.data_path,
+        args.size,
+        args.blur,
+        args.cache_size,
+        frame_mode=args.frame,
+    )
     return generator.run()
 
 
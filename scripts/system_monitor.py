@@ -1,24 +1,570 @@
 #!/usr/bin/env python3
-import time
-import sys
-import os
+import argparse
+import ctypes
+import fcntl
+import glob
+import heapq
 import json
-import subprocess
+import os
+import platform
 import re
+import resource
+import selectors
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Metric groups a client can subscribe to, and the collectors feeding each
+DEFAULT_METRICS = ("cpu", "ram", "disk", "gpu")
+METRIC_COLLECTORS = {
+    "cpu": ("cpu", "temp"),
+    "ram": ("ram",),
+    "disk": ("disk",),
+    "gpu": ("gpu",),
+    "procs": ("procs",),
+    "io": ("diskio",),
+    "net": ("net",),
+    "power": ("rapl", "battery"),
+    "thermal": ("thermal",),
+}
+
+# Collector scheduling: (period in seconds or None for every tick,
+# max backoff factor while stable, change tolerance)
+COLLECTOR_DEFAULTS = {
+    "cpu": (None, 1, 0.0),
+    "temp": (5.0, 4, 1.0),
+    "ram": (None, 4, 0.5),
+    "disk": (30.0, 4, 0.1),
+    "gpu": (None, 8, 1.0),
+    "procs": (5.0, 1, 0.0),
+    "diskio": (None, 4, 1024.0),
+    "net": (None, 4, 1024.0),
+    "rapl": (None, 4, 0.5),
+    "battery": (5.0, 4, 0.1),
+    "thermal": (5.0, 4, 1.0),
+}
+
+
+class CachedFile:
+    """A file kept open and re-read with pread, saving an open/close per sample."""
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        self.fd = None
+
+    def read(self):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            return os.pread(self.fd, self.size, 0)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def rooted(root, path):
+    """Map an absolute /proc or /sys path into a fixture root."""
+    if root == "/":
+        return path
+    return os.path.join(root, path.lstrip("/"))
+
+
+def _read_once(path, size=4096):
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+class ProcessEntry:
+    __slots__ = ("pid", "name", "starttime", "jiffies", "stamp", "cpu", "rss", "file")
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.name = ""
+        self.starttime = None
+        self.jiffies = 0
+        self.stamp = 0.0
+        self.cpu = 0.0
+        self.rss = 0
+        self.file = None
+
+
+class ProcessTable:
+    """
+    Top-N CPU and memory consumers from /proc/[pid]/stat.
+
+    RSS comes from the same stat line as the jiffies, so statm isn't read.
+    PIDs seen on a second pass keep their stat fd open and are re-read with
+    pread; a dead process makes the read fail, so stale fds can't alias a
+    reused PID. A pass stops once it has used `budget` seconds of CPU time
+    and resumes on the next call, so thousands of processes are spread
+    over several ticks. CPU percentages are per-process jiffy deltas over
+    each entry's own sampling interval, normalised to the whole machine.
+    """
+
+    def __init__(self, top_n=5, budget=0.01, root="/"):
+        self.top_n = top_n
+        self.budget = budget
+        self.proc = rooted(root, "/proc")
+        self.entries = {}
+        self.pending = []
+        self.position = 0
+        self.seen = set()
+        self.cached = 0
+        self.result = {"cpu": [], "mem": []}
+        self.clk_tck = os.sysconf("SC_CLK_TCK")
+        self.page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+        self.cpu_count = os.cpu_count() or 1
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        self.max_cached = max(0, min(1024, soft // 2 - 64))
+
+    @property
+    def in_progress(self):
+        return self.position < len(self.pending)
+
+    def _drop(self, pid):
+        entry = self.entries.pop(pid, None)
+        if entry is not None and entry.file is not None:
+            entry.file.close()
+            self.cached -= 1
+
+    def _update(self, pid, now):
+        entry = self.entries.get(pid)
+        try:
+            if entry is not None and entry.file is not None:
+                data = entry.file.read()
+            elif entry is not None and self.cached < self.max_cached:
+                # Long-lived enough to be worth an fd
+                entry.file = CachedFile(f"{self.proc}/{pid}/stat")
+                self.cached += 1
+                data = entry.file.read()
+            else:
+                data = _read_once(f"{self.proc}/{pid}/stat")
+        except OSError:
+            self._drop(pid)
+            return
+
+        # comm may contain spaces and parentheses
+        end = data.rfind(b")")
+        fields = data[end + 2 :].split()
+        try:
+            jiffies = int(fields[11]) + int(fields[12])
+            starttime = fields[19]
+            rss = int(fields[21]) * self.page_kb
+        except (IndexError, ValueError):
+            return
+
+        if entry is None or entry.starttime != starttime:
+            if entry is not None:
+                self._drop(pid)
+            entry = ProcessEntry(pid)
+            entry.name = data[data.find(b"(") + 1 : end].decode("utf-8", "replace")
+            entry.starttime = starttime
+            self.entries[pid] = entry
+        elif now > entry.stamp:
+            seconds = (jiffies - entry.jiffies) / self.clk_tck
+            entry.cpu = seconds * 100.0 / ((now - entry.stamp) * self.cpu_count)
+
+        entry.jiffies = jiffies
+        entry.stamp = now
+        entry.rss = rss
+
+    def _rank(self):
+        entries = self.entries.values()
+        busy = heapq.nlargest(
+            self.top_n, (e for e in entries if e.cpu > 0), key=lambda e: e.cpu
+        )
+        hungry = heapq.nlargest(self.top_n, entries, key=lambda e: e.rss)
+
+        def row(e):
+            return {"pid": e.pid, "name": e.name, "cpu": e.cpu, "rss": e.rss}
+
+        return {"cpu": [row(e) for e in busy], "mem": [row(e) for e in hungry]}
+
+    def sample(self):
+        started = time.thread_time()
+        if not self.in_progress:
+            try:
+                self.pending = [
+                    int(e.name) for e in os.scandir(self.proc) if e.name.isdigit()
+                ]
+            except OSError:
+                self.pending = []
+            self.position = 0
+            self.seen = set()
+
+        while self.position < len(self.pending):
+            pid = self.pending[self.position]
+            self.position += 1
+            self._update(pid, time.monotonic())
+            self.seen.add(pid)
+            if self.position % 32 == 0 and time.thread_time() - started > self.budget:
+                # Out of budget, keep the previous ranking until the pass ends
+                return self.result
+
+        for pid in [p for p in self.entries if p not in self.seen]:
+            self._drop(pid)
+        self.result = self._rank()
+        return self.result
+
+
+# perf_event_open syscall numbers by architecture
+PERF_EVENT_OPEN_NR = {
+    "x86_64": 298,
+    "aarch64": 241,
+    "riscv64": 241,
+    "i386": 336,
+    "i686": 336,
+    "armv7l": 364,
+    "ppc64le": 319,
+}
+PERF_FLAG_FD_CLOEXEC = 8
+
+NVIDIA_QUERY = (
+    "utilization.gpu,temperature.gpu,memory.used,memory.total,"
+    "power.draw,clocks.gr,clocks.mem"
+)
+
+# Host facts stored next to a fixture tree
+FIXTURE_META = ".fixture.json"
+
+# GPU fields reported per device, with the value used when unavailable
+GPU_FIELDS = {
+    "usages": 0.0,
+    "temps": -1,
+    "vram_used": -1,
+    "vram_total": -1,
+    "power": -1.0,
+    "core_clock": -1,
+    "mem_clock": -1,
+}
+
+
+def _read_number(cached, default=-1):
+    if cached is None:
+        return default
+    try:
+        return int(cached.read().strip())
+    except (OSError, ValueError):
+        return default
+
+
+class PerfEventAttr(ctypes.Structure):
+    # PERF_ATTR_SIZE_VER0 layout, enough for counting events
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+    ]
+
+
+class IntelPmuBusy:
+    """
+    Engine busyness from the i915 PMU via perf_event_open.
+
+    Each *-busy event counts nanoseconds an engine class was busy; the
+    busiest engine over the sampling interval is the GPU usage. Needs
+    CAP_PERFMON or kernel.perf_event_paranoid <= 0, so open() may fail.
+    """
+
+    def __init__(self, pci_slot):
+        self.pci_slot = pci_slot
+        self.fds = []
+        self.prev = None
+        self.prev_time = 0.0
+
+    def _pmu_dir(self):
+        base = "/sys/bus/event_source/devices"
+        # Integrated GPUs register "i915", discrete ones "i915_<pci slot>"
+        for name in ("i915_" + self.pci_slot.replace(":", "_"), "i915"):
+            if os.path.exists(os.path.join(base, name, "type")):
+                return os.path.join(base, name)
+        return None
+
+    def open(self):
+        nr = PERF_EVENT_OPEN_NR.get(platform.machine())
+        pmu = self._pmu_dir()
+        if nr is None or pmu is None:
+            return False
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            with open(os.path.join(pmu, "type")) as f:
+                pmu_type = int(f.read().strip())
+            cpu = 0
+            if os.path.exists(os.path.join(pmu, "cpumask")):
+                with open(os.path.join(pmu, "cpumask")) as f:
+                    cpu = int(re.split(r"[,-]", f.read().strip())[0])
+            events_dir = os.path.join(pmu, "events")
+            for event in sorted(os.listdir(events_dir)):
+                if not event.endswith("-busy"):
+                    continue
+                with open(os.path.join(events_dir, event)) as f:
+                    match = re.search(r"config=(0x[0-9a-fA-F]+|\d+)", f.read())
+                if not match:
+                    continue
+                attr = PerfEventAttr()
+                attr.type = pmu_type
+                attr.size = ctypes.sizeof(PerfEventAttr)
+                attr.config = int(match.group(1), 0)
+                fd = libc.syscall(
+                    nr, ctypes.byref(attr), -1, cpu, -1, PERF_FLAG_FD_CLOEXEC
+                )
+                if fd >= 0:
+                    self.fds.append(fd)
+        except (OSError, ValueError, AttributeError):
+            pass
+        return bool(self.fds)
+
+    def read(self):
+        now = time.monotonic()
+        try:
+            values = [int.from_bytes(os.read(fd, 8), "little") for fd in self.fds]
+        except OSError:
+            return 0.0
+        usage = 0.0
+        if self.prev is not None and now > self.prev_time:
+            elapsed_ns = (now - self.prev_time) * 1e9
+            busiest = max(max(0, v - p) for v, p in zip(values, self.prev))
+            usage = min(100.0, busiest * 100.0 / elapsed_ns)
+        self.prev = values
+        self.prev_time = now
+        return usage
+
+
+class DrmFdinfoBusy:
+    """
+    Engine busyness from per-client counters in fdinfo.
+
+    i915 and amdgpu report drm-engine-* nanoseconds; xe reports
+    drm-cycles-* against drm-total-cycles-*, so busyness there is the
+    ratio of the two deltas. Works unprivileged for our own processes.
+    Only fds pointing at /dev/dri are inspected, and clients are
+    deduplicated by drm-client-id. Walking every /proc/<pid>/fd is the
+    expensive part, so the drm fds found are reused and the pids only
+    rescanned every RESCAN_TICKS reads.
+    """
+
+    RESCAN_TICKS = 5
+
+    ENGINE_NS_RE = re.compile(r"^drm-engine-([\w-]+):\s+(\d+) ns", re.M)
+    CYCLES_RE = re.compile(r"^drm-(total-)?cycles-([\w-]+):\s+(\d+)", re.M)
+    CLIENT_ID_RE = re.compile(r"^drm-client-id:\s+(\d+)", re.M)
+
+    def __init__(self, pci_slot, root="/"):
+        self.pci_slot = pci_slot
+        self.proc = rooted(root, "/proc")
+        self.fdinfo_paths = []
+        self.ticks_since_scan = self.RESCAN_TICKS
+        self.prev = {}
+        self.prev_time = 0.0
+
+    def _scan(self):
+        """fdinfo paths of every fd open on a /dev/dri node."""
+        paths = []
+        try:
+            pids = [e.name for e in os.scandir(self.proc) if e.name.isdigit()]
+        except OSError:
+            return paths
+        for pid in pids:
+            try:
+                fds = list(os.scandir(f"{self.proc}/{pid}/fd"))
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    if os.readlink(fd.path).startswith("/dev/dri/"):
+                        paths.append(f"{self.proc}/{pid}/fdinfo/{fd.name}")
+                except OSError:
+                    continue
+        return paths
+
+    def _parse(self, info):
+        """Engine counters of one client: ns busy and (cycles, total) pairs."""
+        cycles, totals = {}, {}
+        for total, engine, value in self.CYCLES_RE.findall(info):
+            (totals if total else cycles)[engine] = int(value)
+        return {
+            "ns": {engine: int(ns) for engine, ns in self.ENGINE_NS_RE.findall(info)},
+            "cycles": {
+                engine: (value, totals[engine])
+                for engine, value in cycles.items()
+                if engine in totals
+            },
+        }
+
+    def _clients(self):
+        if self.ticks_since_scan >= self.RESCAN_TICKS:
+            self.fdinfo_paths = self._scan()
+            self.ticks_since_scan = 0
+        self.ticks_since_scan += 1
+
+        clients = {}
+        live = []
+        for path in self.fdinfo_paths:
+            try:
+                with open(path) as f:
+                    info = f.read()
+            except OSError:
+                # Process exited or closed the fd; forget it until the next scan
+                continue
+            live.append(path)
+            if f"drm-pdev:\t{self.pci_slot}" not in info:
+                continue
+            match = self.CLIENT_ID_RE.search(info)
+            if not match or match.group(1) in clients:
+                continue
+            clients[match.group(1)] = self._parse(info)
+        self.fdinfo_paths = live
+        return clients
+
+    def read(self):
+        now = time.monotonic()
+        clients = self._clients()
+        usages = []
+        if self.prev_time and now > self.prev_time:
+            busy_ns, busy_cycles, total_cycles = {}, {}, {}
+            for client_id, counters in clients.items():
+                prev = self.prev.get(client_id)
+                if prev is None:
+                    continue
+                for engine, ns in counters["ns"].items():
+                    if engine in prev["ns"]:
+                        delta = max(0, ns - prev["ns"][engine])
+                        busy_ns[engine] = busy_ns.get(engine, 0) + delta
+                for engine, (cycles, total) in counters["cycles"].items():
+                    if engine in prev["cycles"]:
+                        prev_cycles, prev_total = prev["cycles"][engine]
+                        delta = max(0, cycles - prev_cycles)
+                        busy_cycles[engine] = busy_cycles.get(engine, 0) + delta
+                        # Every client sees the same GPU timestamp counter
+                        total_cycles[engine] = max(
+                            total_cycles.get(engine, 0), total - prev_total
+                        )
+            elapsed_ns = (now - self.prev_time) * 1e9
+            usages += [ns * 100.0 / elapsed_ns for ns in busy_ns.values()]
+            usages += [
+                busy_cycles[engine] * 100.0 / total
+                for engine, total in total_cycles.items()
+                if total > 0
+            ]
+        self.prev = clients
+        self.prev_time = now
+        return min(100.0, max(usages, default=0.0))
 
 
 class SystemMonitor:
-    def __init__(self, disks=[]):
+    def __init__(self, disks=[], top_n=5, proc_budget=0.01, root="/"):
+        # Everything under /proc and /sys is read relative to root, so a
+        # recorded fixture tree can stand in for the live machine
+        self.root = root
+        self.fixture = self._load_fixture()
         self.prev_cpu_total = 0
         self.prev_cpu_idle = 0
         self.monitored_disks = disks
+        self.processes = ProcessTable(top_n, proc_budget, root)
+        self.disk_devices = {}
+        self.diskstats_file = CachedFile(self._path("/proc/diskstats"), 65536)
+        self.netdev_file = CachedFile(self._path("/proc/net/dev"), 65536)
+        self.prev_diskstats = {}
+        self.prev_diskstats_time = 0.0
+        self.prev_netdev = {}
+        self.prev_netdev_time = 0.0
+        self.cpu_temp_file = None
         self.cpu_model = self._detect_cpu_model()
         self.gpu_info = self._detect_gpus()
+        self.rapl_zones = self._detect_rapl_zones()
+        self.batteries = self._detect_batteries()
+        self.thermal_zones = self._detect_thermal_zones()
         self.disk_types = self._detect_disk_types(disks)
 
+    def _path(self, path):
+        return rooted(self.root, path)
+
+    def _load_fixture(self):
+        """Host facts a fixture can't express as files (see FixtureRecorder)."""
+        if self.root == "/":
+            return None
+        try:
+            with open(os.path.join(self.root, FIXTURE_META), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _resolve_device(self, dev):
+        """Kernel block device name behind a /dev path."""
+        if self.fixture is not None:
+            return self.fixture.get("devices", {}).get(dev, os.path.basename(dev))
+        return os.path.basename(os.path.realpath(dev))
+
+    def _pci_slot(self, card):
+        if self.fixture is not None:
+            return self.fixture.get("pci_slots", {}).get(card, "")
+        device = f"/sys/class/drm/{card}/device"
+        return os.path.basename(os.path.realpath(device))
+
+    def _statvfs(self, mount):
+        """(f_blocks, f_frsize, f_bavail) for a mount point."""
+        if self.fixture is not None:
+            return tuple(self.fixture["statvfs"][mount])
+        st = os.statvfs(mount)
+        return st.f_blocks, st.f_frsize, st.f_bavail
+
+    def _nvidia_query(self, pci_id):
+        if self.fixture is not None:
+            return self.fixture["nvidia_smi"][pci_id]
+        return (
+            subprocess.check_output(
+                [
+                    "nvidia-smi",
+                    "-i",
+                    pci_id,
+                    "--query-gpu=" + NVIDIA_QUERY,
+                    "--format=csv,noheader,nounits",
+                ]
+            )
+            .decode("utf-8")
+            .strip()
+        )
+
+    def add_disks(self, disks):
+        """Detect types for mount points not seen before."""
+        new_disks = [d for d in disks if d not in self.disk_types]
+        if new_disks:
+            self.monitored_disks = self.monitored_disks + new_disks
+            self.disk_types.update(self._detect_disk_types(new_disks))
+
+    def get_static(self, disks):
+        return {
+            "static": {
+                "cpu_model": self.cpu_model,
+                "gpu_names": [g["name"] for g in self.gpu_info],
+                "gpu_vendors": [g["vendor"] for g in self.gpu_info],
+                "disk_types": {d: self.disk_types.get(d, "unknown") for d in disks},
+                "gpu_count": len(self.gpu_info),
+            }
+        }
+
     def _detect_cpu_model(self):
         try:
-            with open("/proc/cpuinfo", "r") as f:
+            with open(self._path("/proc/cpuinfo"), "r") as f:
                 for line in f:
                     if "model name" in line:
                         model = line.split(":", 1)[1].strip()
@@ -38,7 +584,7 @@ class SystemMonitor:
 
     def _detect_gpus(self):
         gpus = []
-        nvidia_base = "/proc/driver/nvidia/gpus"
+        nvidia_base = self._path("/proc/driver/nvidia/gpus")
         if os.path.exists(nvidia_base):
             for entry in os.listdir(nvidia_base):
                 path = os.path.join(nvidia_base, entry, "information")
@@ -56,12 +602,14 @@ class SystemMonitor:
                                     gpu["name"] = line.split(":", 1)[1].strip()
                     except:
                         pass
-                    pci_path = f"/sys/bus/pci/devices/{entry}/power/runtime_status"
+                    pci_path = self._path(
+                        f"/sys/bus/pci/devices/{entry}/power/runtime_status"
+                    )
                     if os.path.exists(pci_path):
                         gpu["power_path"] = pci_path
                     gpus.append(gpu)
 
-        drm_base = "/sys/class/drm"
+        drm_base = self._path("/sys/class/drm")
         if os.path.exists(drm_base):
             for card in os.listdir(drm_base):
                 if not card.startswith("card") or "-" in card:
@@ -93,23 +641,197 @@ class SystemMonitor:
                         )
                 except:
                     pass
+
+        for gpu in gpus:
+            if gpu["vendor"] == "amd":
+                self._resolve_amd(gpu)
+            elif gpu["vendor"] == "intel":
+                self._resolve_intel(gpu)
         return gpus
 
+    @staticmethod
+    def _first_hwmon(device):
+        hwmon_base = os.path.join(device, "hwmon")
+        try:
+            entries = sorted(os.listdir(hwmon_base))
+        except OSError:
+            return None
+        return os.path.join(hwmon_base, entries[0]) if entries else None
+
+    @staticmethod
+    def _cached_if_exists(*candidates):
+        for path in candidates:
+            if path and os.path.exists(path):
+                return CachedFile(path)
+        return None
+
+    def _resolve_amd(self, gpu):
+        """Resolve amdgpu sysfs files once; each tick is then a pread per value."""
+        device = self._path(f"/sys/class/drm/{gpu['card']}/device")
+        hwmon = self._first_hwmon(device)
+        hw = (lambda name: os.path.join(hwmon, name)) if hwmon else (lambda name: None)
+        gpu["files"] = {
+            "busy": self._cached_if_exists(os.path.join(device, "gpu_busy_percent")),
+            "vram_used": self._cached_if_exists(
+                os.path.join(device, "mem_info_vram_used")
+            ),
+            "temp": self._cached_if_exists(hw("temp1_input")),
+            # Older kernels only expose the instantaneous reading
+            "power": self._cached_if_exists(hw("power1_average"), hw("power1_input")),
+            "sclk": self._cached_if_exists(hw("freq1_input")),
+            "mclk": self._cached_if_exists(hw("freq2_input")),
+        }
+        gpu["vram_total"] = -1
+        try:
+            with open(os.path.join(device, "mem_info_vram_total"), "r") as f:
+                gpu["vram_total"] = int(f.read().strip()) // (1024 * 1024)
+        except:
+            pass
+
+    def _resolve_intel(self, gpu):
+        """Resolve i915/xe sysfs files and pick an engine busyness source."""
+        card = self._path(f"/sys/class/drm/{gpu['card']}")
+        device = os.path.join(card, "device")
+        pci_slot = self._pci_slot(gpu["card"])
+        hwmon = self._first_hwmon(device)
+        hw = (lambda name: os.path.join(hwmon, name)) if hwmon else (lambda name: None)
+        gpu["files"] = {
+            # Discrete cards have a hwmon; integrated ones share the CPU's
+            "temp": self._cached_if_exists(hw("temp1_input")),
+            "energy": self._cached_if_exists(hw("energy1_input")),
+            "freq": self._cached_if_exists(
+                os.path.join(card, "gt_act_freq_mhz"),
+                os.path.join(device, "tile0", "gt0", "freq0", "act_freq"),
+            ),
+        }
+        gpu["prev_energy"] = None
+        busy = IntelPmuBusy(pci_slot)
+        # perf counters can't be replayed from a fixture
+        if self.root == "/" and busy.open():
+            gpu["busy"] = busy
+        else:
+            gpu["busy"] = DrmFdinfoBusy(pci_slot, self.root)
+
+    def _detect_rapl_zones(self):
+        """Find readable RAPL energy counters (Intel and AMD share the driver)."""
+        zones = []
+        base = self._path("/sys/class/powercap")
+        try:
+            entries = sorted(os.listdir(base))
+        except OSError:
+            return zones
+        names = {}
+        for entry in entries:
+            if not entry.startswith("intel-rapl:"):
+                continue
+            path = os.path.join(base, entry)
+            try:
+                with open(os.path.join(path, "name"), "r") as f:
+                    name = f.read().strip()
+                with open(os.path.join(path, "max_energy_range_uj"), "r") as f:
+                    max_range = int(f.read().strip())
+                energy = CachedFile(os.path.join(path, "energy_uj"))
+                # Root-only on kernels patched against PLATYPUS
+                int(energy.read().strip())
+            except (OSError, ValueError):
+                continue
+            names[entry] = name
+            # Subzones (intel-rapl:0:0) are keyed under their package
+            parent = entry.rsplit(":", 1)[0]
+            if parent in names:
+                name = f"{names[parent]}/{name}"
+            zones.append(
+                {
+                    "name": name,
+                    "file": energy,
+                    "max_range": max_range,
+                    "prev": None,
+                    "prev_time": 0.0,
+                }
+            )
+        return zones
+
+    def _detect_batteries(self):
+        batteries = []
+        base = self._path("/sys/class/power_supply")
+        try:
+            entries = sorted(os.listdir(base))
+        except OSError:
+            return batteries
+        for entry in entries:
+            path = os.path.join(base, entry)
+            try:
+                with open(os.path.join(path, "type"), "r") as f:
+                    if f.read().strip() != "Battery":
+                        continue
+            except OSError:
+                continue
+            try:
+                # Skip mice, headsets and other peripherals
+                with open(os.path.join(path, "scope"), "r") as f:
+                    if f.read().strip() == "Device":
+                        continue
+            except OSError:
+                pass
+            files = {}
+            for name in (
+                "power_now",
+                "current_now",
+                "voltage_now",
+                "status",
+                "capacity",
+            ):
+                if os.path.exists(os.path.join(path, name)):
+                    files[name] = CachedFile(os.path.join(path, name))
+            batteries.append({"name": entry, "files": files})
+        return batteries
+
+    def _detect_thermal_zones(self):
+        zones = []
+        base = self._path("/sys/class/thermal")
+        try:
+            entries = sorted(
+                (e for e in os.listdir(base) if e.startswith("thermal_zone")),
+                key=lambda e: int(e[len("thermal_zone") :] or 0),
+            )
+        except (OSError, ValueError):
+            return zones
+        seen = {}
+        for entry in entries:
+            path = os.path.join(base, entry)
+            try:
+                with open(os.path.join(path, "type"), "r") as f:
+                    name = f.read().strip()
+            except OSError:
+                continue
+            # Several zones can share a type (acpitz, acpitz-1, ...)
+            count = seen.get(name, 0)
+            seen[name] = count + 1
+            if count:
+                name = f"{name}-{count}"
+            zones.append({"name": name, "file": CachedFile(os.path.join(path, "temp"))})
+        return zones
+
     def _detect_disk_types(self, disks):
         types = {}
         for mount in disks:
             types[mount] = "unknown"
             try:
-                with open("/proc/mounts", "r") as f:
+                with open(self._path("/proc/mounts"), "r") as f:
                     for line in f:
                         parts = line.split()
                         if parts[1] == mount:
                             dev = parts[0]
                             if dev.startswith("/dev/"):
+                                # Resolve /dev/mapper and by-* links to the
+                                # kernel name used in /proc/diskstats
+                                self.disk_devices[mount] = self._resolve_device(dev)
                                 base = re.sub(
                                     r"p?[0-9]*$", "", dev.replace("/dev/", "")
                                 )
-                                rota_path = f"/sys/block/{base}/queue/rotational"
+                                rota_path = self._path(
+                                    f"/sys/block/{base}/queue/rotational"
+                                )
                                 if os.path.exists(rota_path):
                                     with open(rota_path, "r") as f2:
                                         types[mount] = (
@@ -122,7 +844,7 @@ class SystemMonitor:
 
     def get_cpu(self):
         try:
-            with open("/proc/stat", "r") as f:
+            with open(self._path("/proc/stat"), "r") as f:
                 line = f.readline()
                 if not line.startswith("cpu "):
                     return 0.0
@@ -142,7 +864,15 @@ class SystemMonitor:
             return 0.0
 
     def get_cpu_temp(self):
-        base = "/sys/class/hwmon"
+        if self.cpu_temp_file is not None:
+            val = _read_number(self.cpu_temp_file)
+            if 10000 < val < 120000:
+                return val // 1000
+            # Sensor went away or reads garbage, search again
+            self.cpu_temp_file.close()
+            self.cpu_temp_file = None
+
+        base = self._path("/sys/class/hwmon")
         if not os.path.exists(base):
             return -1
         for hwmon in os.listdir(base):
@@ -163,6 +893,9 @@ class SystemMonitor:
                             with open(os.path.join(path, item), "r") as f:
                                 val = int(f.read().strip())
                                 if 10000 < val < 120000:
+                                    self.cpu_temp_file = CachedFile(
+                                        os.path.join(path, item)
+                                    )
                                     return val // 1000
             except:
                 continue
@@ -172,7 +905,7 @@ class SystemMonitor:
         try:
             mem_total = 0
             mem_available = 0
-            with open("/proc/meminfo", "r") as f:
+            with open(self._path("/proc/meminfo"), "r") as f:
                 for line in f:
                     if line.startswith("MemTotal:"):
                         mem_total = int(line.split()[1])
@@ -191,10 +924,10 @@ class SystemMonitor:
         usage_map = {}
         for mount in disks:
             try:
-                st = os.statvfs(mount)
-                total = st.f_blocks * st.f_frsize
+                blocks, frsize, bavail = self._statvfs(mount)
+                total = blocks * frsize
                 if total > 0:
-                    used = total - (st.f_bavail * st.f_frsize)
+                    used = total - (bavail * frsize)
                     usage_map[mount] = (used / total) * 100.0
                 else:
                     usage_map[mount] = 0.0
@@ -202,127 +935,1248 @@ class SystemMonitor:
                 usage_map[mount] = 0.0
         return usage_map
 
+    def get_disk_io(self, disks):
+        """Read/write bytes and operations per second per mount point."""
+        io_map = {
+            mount: {
+                "read_bps": 0.0,
+                "write_bps": 0.0,
+                "read_iops": 0.0,
+                "write_iops": 0.0,
+            }
+            for mount in disks
+        }
+        try:
+            data = self.diskstats_file.read()
+        except OSError:
+            return io_map
+        now = time.monotonic()
+
+        wanted = {
+            self.disk_devices[m].encode() for m in disks if m in self.disk_devices
+        }
+        stats = {}
+        for line in data.split(b"\n"):
+            fields = line.split()
+            if len(fields) >= 10 and fields[2] in wanted:
+                # reads, sectors read, writes, sectors written (512-byte sectors)
+                stats[fields[2].decode()] = (
+                    int(fields[3]),
+                    int(fields[5]) * 512,
+                    int(fields[7]),
+                    int(fields[9]) * 512,
+                )
+
+        elapsed = now - self.prev_diskstats_time
+        for mount in disks:
+            dev = self.disk_devices.get(mount)
+            cur = stats.get(dev)
+            prev = self.prev_diskstats.get(dev)
+            if cur is None or prev is None or elapsed <= 0:
+                continue
+            # Counters can reset when a device is re-attached
+            reads, read_bytes, writes, write_bytes = (
+                max(0, c - p) for c, p in zip(cur, prev)
+            )
+            io_map[mount] = {
+                "read_bps": read_bytes / elapsed,
+                "write_bps": write_bytes / elapsed,
+                "read_iops": reads / elapsed,
+                "write_iops": writes / elapsed,
+            }
+
+        self.prev_diskstats = stats
+        self.prev_diskstats_time = now
+        return io_map
+
+    def get_net_io(self):
+        """Receive/transmit bytes per second per network interface."""
+        try:
+            data = self.netdev_file.read()
+        except OSError:
+            return {}
+        now = time.monotonic()
+
+        counters = {}
+        # Skip the two header lines
+        for line in data.split(b"\n")[2:]:
+            name, _, rest = line.partition(b":")
+            name = name.strip().decode()
+            fields = rest.split()
+            if not name or name == "lo" or len(fields) < 9:
+                continue
+            counters[name] = (int(fields[0]), int(fields[8]))
+
+        elapsed = now - self.prev_netdev_time
+        rates = {}
+        for name, (rx, tx) in counters.items():
+            prev = self.prev_netdev.get(name)
+            if prev is None or elapsed <= 0:
+                rates[name] = {"rx_bps": 0.0, "tx_bps": 0.0}
+                continue
+            rates[name] = {
+                "rx_bps": max(0, rx - prev[0]) / elapsed,
+                "tx_bps": max(0, tx - prev[1]) / elapsed,
+            }
+
+        self.prev_netdev = counters
+        self.prev_netdev_time = now
+        return rates
+
+    def get_rapl_power(self):
+        """Average power in watts per RAPL zone since the previous read."""
+        power = {}
+        now = time.monotonic()
+        for zone in self.rapl_zones:
+            energy = _read_number(zone["file"])
+            if energy < 0:
+                continue
+            prev = zone["prev"]
+            if prev is not None and now > zone["prev_time"]:
+                delta = energy - prev
+                if delta < 0:
+                    # Counter wrapped at max_energy_range_uj
+                    delta += zone["max_range"]
+                power[zone["name"]] = delta / 1e6 / (now - zone["prev_time"])
+            zone["prev"] = energy
+            zone["prev_time"] = now
+        return power
+
+    def get_battery(self):
+        batteries = {}
+        for battery in self.batteries:
+            files = battery["files"]
+            watts = _read_number(files.get("power_now"))
+            if watts >= 0:
+                watts /= 1e6
+            else:
+                current = _read_number(files.get("current_now"))
+                voltage = _read_number(files.get("voltage_now"))
+                if current >= 0 and voltage >= 0:
+                    watts = current * voltage / 1e12
+            status = "Unknown"
+            if "status" in files:
+                try:
+                    status = files["status"].read().decode().strip()
+                except OSError:
+                    pass
+            batteries[battery["name"]] = {
+                "watts": float(watts),
+                "status": status,
+                "capacity": _read_number(files.get("capacity")),
+            }
+        return batteries
+
+    def get_thermal_zones(self):
+        temps = {}
+        for zone in self.thermal_zones:
+            val = _read_number(zone["file"], None)
+            if val is not None:
+                temps[zone["name"]] = val / 1000.0
+        return temps
+
+    def get_top_processes(self):
+        return self.processes.sample()
+
+    def _nvidia_stats(self, gpu):
+        stats = {}
+        if gpu.get("power_path"):
+            try:
+                with open(gpu["power_path"], "r") as f:
+                    if f.read().strip() != "active":
+                        # Suspended, querying would wake it up
+                        return stats
+            except:
+                pass
+
+        try:
+            out = self._nvidia_query(gpu["pci_id"])
+        except:
+            return stats
+
+        parts = [p.strip() for p in out.split(",")]
+        for field, cast, value in zip(
+            (
+                "usages",
+                "temps",
+                "vram_used",
+                "vram_total",
+                "power",
+                "core_clock",
+                "mem_clock",
+            ),
+            (float, int, int, int, float, int, int),
+            parts,
+        ):
+            try:
+                stats[field] = cast(float(value))
+            except ValueError:
+                # "[N/A]" on boards that don't report it
+                pass
+        return stats
+
+    def _amd_stats(self, gpu):
+        files = gpu["files"]
+        stats = {"vram_total": gpu["vram_total"]}
+        busy = _read_number(files["busy"])
+        if busy >= 0:
+            stats["usages"] = float(busy)
+        temp = _read_number(files["temp"])
+        if temp >= 0:
+            stats["temps"] = temp // 1000
+        vram_used = _read_number(files["vram_used"])
+        if vram_used >= 0:
+            stats["vram_used"] = vram_used // (1024 * 1024)
+        power = _read_number(files["power"])
+        if power >= 0:
+            stats["power"] = power / 1e6
+        sclk = _read_number(files["sclk"])
+        if sclk >= 0:
+            stats["core_clock"] = sclk // 1000000
+        mclk = _read_number(files["mclk"])
+        if mclk >= 0:
+            stats["mem_clock"] = mclk // 1000000
+        return stats
+
+    def _intel_stats(self, gpu):
+        files = gpu["files"]
+        stats = {"usages": gpu["busy"].read()}
+        temp = _read_number(files["temp"])
+        if temp >= 0:
+            stats["temps"] = temp // 1000
+        freq = _read_number(files["freq"])
+        if freq >= 0:
+            stats["core_clock"] = freq
+        energy = _read_number(files["energy"])
+        now = time.monotonic()
+        if energy >= 0:
+            prev = gpu["prev_energy"]
+            if prev is not None and now > prev[1] and energy >= prev[0]:
+                stats["power"] = (energy - prev[0]) / 1e6 / (now - prev[1])
+            gpu["prev_energy"] = (energy, now)
+        return stats
+
     def get_gpu_stats(self):
-        usages = []
-        temps = []
+        """Per-field lists, one entry per GPU; see GPU_FIELDS for the fallbacks."""
+        result = {field: [] for field in GPU_FIELDS}
         for gpu in self.gpu_info:
-            u, t = 0.0, -1
             if gpu["vendor"] == "nvidia":
-                is_active = True
-                if gpu.get("power_path"):
-                    try:
-                        with open(gpu["power_path"], "r") as f:
-                            is_active = f.read().strip() == "active"
-                    except:
-                        pass
-
-                if is_active:
-                    try:
-                        out = (
-                            subprocess.check_output(
-                                [
-                                    "nvidia-smi",
-                                    "-i",
-                                    gpu["pci_id"],
-                                    "--query-gpu=utilization.gpu,temperature.gpu",
-                                    "--format=csv,noheader,nounits",
-                                ]
-                            )
-                            .decode("utf-8")
-                            .strip()
-                        )
-                        parts = out.split(",")
-                        if len(parts) >= 2:
-                            u, t = float(parts[0]), int(parts[1])
-                    except:
-                        pass
-                else:
-                    u, t = 0.0, -1
+                stats = self._nvidia_stats(gpu)
             elif gpu["vendor"] == "amd":
-                card = gpu["card"]
-                try:
-                    with open(
-                        f"/sys/class/drm/{card}/device/gpu_busy_percent", "r"
-                    ) as f:
-                        u = float(f.read().strip())
-                except:
-                    pass
-                try:
-                    hwmon_base = f"/sys/class/drm/{card}/device/hwmon"
-                    if os.path.exists(hwmon_base):
-                        hwmon_dir = os.listdir(hwmon_base)[0]
-                        with open(
-                            os.path.join(hwmon_base, hwmon_dir, "temp1_input"), "r"
-                        ) as f:
-                            t = int(f.read().strip()) // 1000
-                except:
-                    pass
+                stats = self._amd_stats(gpu)
             elif gpu["vendor"] == "intel":
+                stats = self._intel_stats(gpu)
+            else:
+                stats = {}
+            for field, default in GPU_FIELDS.items():
+                result[field].append(stats.get(field, default))
+        return result
+
+
+def _numbers(value):
+    """Flatten a sampled value into the numbers used for stability checks."""
+    if isinstance(value, dict):
+        value = [value[k] for k in sorted(value)]
+    if isinstance(value, (list, tuple)):
+        nums = []
+        for item in value:
+            nums.extend(_numbers(item))
+        return nums
+    if isinstance(value, (int, float)):
+        return [value]
+    return []
+
+
+class Collector:
+    """
+    One sampled value with its own rate.
+
+    Deadlines are monotonic and advance by the period rather than from the
+    end of sampling, so slow collectors don't drift the cadence. While
+    consecutive samples stay within tolerance the period doubles, up to
+    max_backoff times the base period; any change snaps it back.
+    """
+
+    STABLE_AFTER = 3
+
+    def __init__(
+        self, name, fn, period, max_backoff=1, tolerance=0.0, key=None, pending=None
+    ):
+        self.name = name
+        self.fn = fn
+        self.base_period = period
+        self.period = period
+        self.max_backoff = max(1, max_backoff)
+        self.tolerance = tolerance
+        self.key = key or (lambda value: value)
+        # Collectors that spread work over several ticks report unfinished work
+        self.pending = pending or (lambda: False)
+        self.value = None
+        self.next_due = 0.0
+        self.stable_count = 0
+        # Self-overhead accounting, only gathered in --profile mode
+        self.profiled = False
+        self.calls = 0
+        self.wall_ns = 0
+        self.cpu_ns = 0
+
+    def set_base_period(self, period):
+        if period != self.base_period:
+            self.base_period = period
+            self.period = period
+            self.stable_count = 0
+            self.next_due = min(self.next_due, time.monotonic() + period)
+
+    def reset(self):
+        self.next_due = 0.0
+
+    def due(self, now, slack=0.0):
+        return self.value is None or self.pending() or now >= self.next_due - slack
+
+    def _is_stable(self, value):
+        old = _numbers(self.key(self.value))
+        new = _numbers(self.key(value))
+        if len(old) != len(new):
+            return False
+        return all(abs(a - b) <= self.tolerance for a, b in zip(old, new))
+
+    def sample(self, now):
+        if self.profiled:
+            wall = time.perf_counter_ns()
+            cpu = time.thread_time_ns()
+            value = self.fn()
+            self.cpu_ns += time.thread_time_ns() - cpu
+            self.wall_ns += time.perf_counter_ns() - wall
+            self.calls += 1
+        else:
+            value = self.fn()
+        if self.max_backoff > 1 and self.value is not None and self._is_stable(value):
+            self.stable_count += 1
+            if self.stable_count >= self.STABLE_AFTER:
+                self.stable_count = 0
+                self.period = min(self.period * 2, self.base_period * self.max_backoff)
+        else:
+            self.stable_count = 0
+            self.period = self.base_period
+        self.value = value
+
+        self.next_due += self.period
+        if self.next_due <= now:
+            self.next_due = now + self.period
+        return value
+
+
+class SelfUsage:
+    """The monitor's own footprint: RSS, CPU time and context switches."""
+
+    def __init__(self):
+        self.statm = CachedFile("/proc/self/statm")
+        self.page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+
+    def report(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # nvidia-smi and friends run as children
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            rss = int(self.statm.read().split()[1]) * self.page_kb
+        except (OSError, IndexError, ValueError):
+            rss = -1
+        return {
+            "rss_kb": rss,
+            "cpu_ms": (usage.ru_utime + usage.ru_stime) * 1000.0,
+            "children_cpu_ms": (children.ru_utime + children.ru_stime) * 1000.0,
+            "ctx_switches": {
+                "voluntary": usage.ru_nvcsw,
+                "involuntary": usage.ru_nivcsw,
+            },
+        }
+
+
+class Sampler:
+    """Runs each collector on its own schedule and assembles output groups."""
+
+    def __init__(self, monitor, tick, rates=None, backoff=True, profile=0.0):
+        self.monitor = monitor
+        self.tick = tick
+        self.disks = []
+        self.rates = rates or {}
+        self.collectors = {}
+        # Emit a "self" block every `profile` seconds when non-zero
+        self.profile = profile
+        self.profile_started = time.monotonic()
+        self.self_usage = SelfUsage() if profile else None
+
+        fns = {
+            "cpu": monitor.get_cpu,
+            "temp": monitor.get_cpu_temp,
+            "ram": monitor.get_mem,
+            "disk": lambda: monitor.get_disk_usage(self.disks),
+            "gpu": monitor.get_gpu_stats,
+            "procs": monitor.get_top_processes,
+            "diskio": lambda: monitor.get_disk_io(self.disks),
+            "net": monitor.get_net_io,
+            "rapl": monitor.get_rapl_power,
+            "battery": monitor.get_battery,
+            "thermal": monitor.get_thermal_zones,
+        }
+        keys = {
+            # Only the percentage matters, kB counts always jitter
+            "ram": lambda value: value[0],
+        }
+        pending = {
+            "procs": lambda: monitor.processes.in_progress,
+        }
+        for name, (period, max_backoff, tolerance) in COLLECTOR_DEFAULTS.items():
+            self.collectors[name] = Collector(
+                name,
+                fns[name],
+                self._base_period(name, period),
+                max_backoff if backoff else 1,
+                tolerance,
+                keys.get(name),
+                pending.get(name),
+            )
+            self.collectors[name].profiled = bool(profile)
+
+    def _base_period(self, name, period):
+        if name in self.rates:
+            period = self.rates[name]
+        # Collectors never run faster than the tick
+        return max(self.tick, period or self.tick)
+
+    def set_tick(self, tick):
+        if tick == self.tick:
+            return
+        self.tick = tick
+        for name, collector in self.collectors.items():
+            collector.set_base_period(
+                self._base_period(name, COLLECTOR_DEFAULTS[name][0])
+            )
+
+    def profile_report(self, now):
+        """Per-collector cost over the window since the last report."""
+        collectors = {}
+        for name, collector in self.collectors.items():
+            if not collector.calls:
+                continue
+            collectors[name] = {
+                "calls": collector.calls,
+                "wall_us": collector.wall_ns / collector.calls / 1000.0,
+                "cpu_us": collector.cpu_ns / collector.calls / 1000.0,
+            }
+            collector.calls = collector.wall_ns = collector.cpu_ns = 0
+        report = self.self_usage.report()
+        report["window_s"] = now - self.profile_started
+        report["collectors"] = collectors
+        self.profile_started = now
+        return report
+
+    def set_disks(self, disks):
+        if disks != self.disks:
+            self.disks = list(disks)
+            self.collectors["disk"].reset()
+            self.collectors["diskio"].reset()
+
+    def collect(self, metrics, now=None):
+        """Sample the due collectors behind the requested groups."""
+        if now is None:
+            now = time.monotonic()
+        names = [n for m in metrics for n in METRIC_COLLECTORS.get(m, ())]
+        slack = self.tick * 0.05
+        for name in names:
+            collector = self.collectors[name]
+            if collector.due(now, slack):
+                collector.sample(now)
+
+        values = {n: self.collectors[n].value for n in names}
+        data = {}
+        if "cpu" in metrics:
+            data["cpu"] = {"usage": values["cpu"], "temp": values["temp"]}
+        if "ram" in metrics:
+            ram_usage, ram_total, ram_used, ram_avail = values["ram"]
+            data["ram"] = {
+                "usage": ram_usage,
+                "total": ram_total,
+                "used": ram_used,
+                "available": ram_avail,
+            }
+        if "disk" in metrics:
+            data["disk"] = {"usage": values["disk"]}
+        if "gpu" in metrics:
+            data["gpu"] = {
+                "detected": len(self.monitor.gpu_info) > 0,
+                "count": len(self.monitor.gpu_info),
+                **values["gpu"],
+            }
+        if "procs" in metrics:
+            data["procs"] = values["procs"]
+        if "io" in metrics:
+            data["io"] = values["diskio"]
+        if "net" in metrics:
+            data["net"] = values["net"]
+        if "power" in metrics:
+            data["power"] = {"rapl": values["rapl"], "battery": values["battery"]}
+        if "thermal" in metrics:
+            data["thermal"] = values["thermal"]
+        if self.profile and now - self.profile_started >= self.profile:
+            data["self"] = self.profile_report(now)
+        # Effective per-collector periods in ms
+        data["intervals"] = {
+            n: int(round(self.collectors[n].period * 1000)) for n in names
+        }
+        return data
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, "ambxst", "system_monitor.sock")
+
+
+def parse_metrics(value, default=DEFAULT_METRICS):
+    if not value:
+        return list(default)
+    metrics = [m.strip() for m in value.split(",") if m.strip()]
+    return [m for m in metrics if m in METRIC_COLLECTORS] or list(default)
+
+
+def parse_rate(value):
+    """Parse a NAME=MS collector rate override."""
+    name, _, ms = value.partition("=")
+    if name not in COLLECTOR_DEFAULTS:
+        raise argparse.ArgumentTypeError(f"unknown collector: {name}")
+    try:
+        return name, max(0.1, int(ms) / 1000.0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {value}")
+
+
+class MonitorClient:
+    """A daemon subscriber with its own interval, metric set and disks."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+        self.interval = 0.0
+        self.metrics = set()
+        self.disks = []
+        self.top = 5
+        self.next_due = 0.0
+
+    @property
+    def subscribed(self):
+        return self.interval > 0
+
+    def subscribe(self, request):
+        try:
+            interval_ms = int(request.get("interval", 2000))
+        except (TypeError, ValueError):
+            interval_ms = 2000
+        metrics = request.get("metrics") or DEFAULT_METRICS
+        disks = request.get("disks") or ["/"]
+        self.interval = max(0.1, interval_ms / 1000.0)
+        self.metrics = {m for m in metrics if m in METRIC_COLLECTORS}
+        self.disks = [d for d in disks if isinstance(d, str) and d]
+        try:
+            self.top = max(1, int(request.get("top", 5)))
+        except (TypeError, ValueError):
+            self.top = 5
+        self.next_due = time.monotonic()
+
+    def send(self, payload):
+        self.sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+
+
+class MonitorDaemon:
+    """
+    Single-instance sampler shared by every consumer over a Unix socket.
+
+    Clients send one JSON line such as
+    {"interval": 2000, "metrics": ["cpu", "ram"], "disks": ["/"]} and receive
+    a static line followed by sample lines. Each tick samples the union of
+    what the due clients need once, then fans the result out.
+    """
+
+    # Clients due within this fraction of their interval share a sample
+    COALESCE_SLACK = 0.05
+
+    def __init__(self, options):
+        self.options = options
+        self.socket_path = options.socket
+        self.idle_timeout = options.idle_timeout
+        self.selector = selectors.DefaultSelector()
+        self.clients = {}
+        self.monitor = None
+        self.sampler = None
+        self.listener = None
+        self.lock_file = None
+
+    def acquire_lock(self):
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        self.lock_file = open(self.socket_path + ".lock", "w")
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.lock_file.close()
+            self.lock_file = None
+            return False
+        return True
+
+    def listen(self):
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.listener.listen(16)
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+    def accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except OSError:
+            return
+        sock.settimeout(1.0)
+        client = MonitorClient(sock)
+        self.clients[sock] = client
+        self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def drop(self, client):
+        self.clients.pop(client.sock, None)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+        self.update_subscriptions()
+
+    def update_subscriptions(self):
+        """Run collectors at the fastest subscriber rate over all their disks."""
+        subscribed = [c for c in self.clients.values() if c.subscribed]
+        if not subscribed or self.sampler is None:
+            return
+        disks = []
+        for client in subscribed:
+            disks += [d for d in client.disks if d not in disks]
+        self.sampler.set_tick(min(c.interval for c in subscribed))
+        self.sampler.set_disks(disks)
+        self.monitor.processes.top_n = max(c.top for c in subscribed)
+
+    def read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except OSError:
+            data = b""
+        if not data:
+            self.drop(client)
+            return
+        client.buffer += data
+        while b"\n" in client.buffer:
+            line, client.buffer = client.buffer.split(b"\n", 1)
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+            client.subscribe(request)
+            self.monitor.add_disks(client.disks)
+            self.update_subscriptions()
+            try:
+                client.send(self.monitor.get_static(client.disks))
+            except OSError:
+                self.drop(client)
+                return
+
+    def tick(self):
+        now = time.monotonic()
+        due = [
+            c
+            for c in self.clients.values()
+            if c.subscribed and c.next_due - c.interval * self.COALESCE_SLACK <= now
+        ]
+        if not due:
+            return
+
+        metrics = set()
+        for client in due:
+            metrics |= client.metrics
+        data = self.sampler.collect(metrics, now)
+
+        for client in due:
+            payload = {
+                k: v for k, v in data.items() if k in client.metrics or k == "self"
+            }
+            names = [n for m in client.metrics for n in METRIC_COLLECTORS[m]]
+            payload["intervals"] = {n: data["intervals"][n] for n in names}
+            if "disk" in payload:
+                usage = payload["disk"]["usage"]
+                payload["disk"] = {
+                    "usage": {d: usage.get(d, 0.0) for d in client.disks}
+                }
+            if "io" in payload:
+                io_map = payload["io"]
+                payload["io"] = {d: io_map[d] for d in client.disks if d in io_map}
+            if "procs" in payload:
+                payload["procs"] = {
+                    k: v[: client.top] for k, v in payload["procs"].items()
+                }
+            try:
+                client.send(payload)
+            except OSError:
+                self.drop(client)
+                continue
+            # Keep a drift-free cadence unless the client fell behind
+            client.next_due += client.interval
+            if client.next_due <= now:
+                client.next_due = now + client.interval
+
+    def next_timeout(self, idle_since):
+        now = time.monotonic()
+        deadlines = [c.next_due for c in self.clients.values() if c.subscribed]
+        if deadlines:
+            return max(0.0, min(deadlines) - now)
+        if not self.clients:
+            return max(0.0, idle_since + self.idle_timeout - now)
+        return None
+
+    def close(self):
+        for client in list(self.clients.values()):
+            self.drop(client)
+        if self.listener is not None:
+            self.selector.unregister(self.listener)
+            self.listener.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
                 pass
-            usages.append(u)
-            temps.append(t)
-        return usages, temps
+        if self.lock_file is not None:
+            self.lock_file.close()
 
+    def serve(self):
+        if not self.acquire_lock():
+            # Another daemon already owns the socket
+            return 0
 
-if __name__ == "__main__":
-    # Syntax: system_monitor.py [interval_ms] [disk1] [disk2] ...
-    interval_ms = 2000
-    disks = ["/"]
+        # Bind before detection so early clients queue instead of failing
+        self.listen()
+        self.sampler = create_sampler([], 2.0, self.options)
+        self.monitor = self.sampler.monitor
+        idle_since = time.monotonic()
 
-    if len(sys.argv) > 1:
         try:
-            interval_ms = int(sys.argv[1])
-            disks = sys.argv[2:] if len(sys.argv) > 2 else ["/"]
-        except ValueError:
-            disks = sys.argv[1:]
+            while True:
+                for key, _ in self.selector.select(self.next_timeout(idle_since)):
+                    if key.fileobj is self.listener:
+                        self.accept()
+                    else:
+                        self.read(key.data)
+
+                self.tick()
+
+                if self.clients:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= self.idle_timeout:
+                    # Pick up a client that connected while we were deciding
+                    if self.selector.select(0):
+                        continue
+                    return 0
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            self.close()
+
+
+def daemon_args(options):
+    """Daemon-side options a client forwards when it has to start the daemon."""
+    args = []
+    for name, period in options.rate:
+        args += ["--rate", "%s=%d" % (name, round(period * 1000))]
+    if options.no_backoff:
+        args.append("--no-backoff")
+    if options.profile:
+        args += ["--profile", "%g" % options.profile]
+    return args
+
+
+def connect_daemon(socket_path, spawn=True, wait=3.0, extra_args=()):
+    """
+    Connect to the shared daemon, starting it if it isn't running.
+
+    extra_args are passed to a daemon we spawn; an already running daemon
+    keeps the settings it was started with.
+    """
+    deadline = time.monotonic() + wait
+    spawned = False
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            return sock
+        except OSError:
+            sock.close()
+
+        if spawn and not spawned:
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--daemon",
+                    "--socket",
+                    socket_path,
+                    *extra_args,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            spawned = True
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+
+
+def run_client(interval_ms, metrics, disks, options):
+    """Relay a daemon subscription to stdout, in the standalone output format."""
+    request = json.dumps(
+        {
+            "interval": interval_ms,
+            "metrics": metrics,
+            "disks": disks,
+            "top": options.top,
+        }
+    )
+    failures = 0
+    while failures < 3:
+        sock = connect_daemon(options.socket, extra_args=daemon_args(options))
+        if sock is None:
+            break
+        try:
+            sock.sendall((request + "\n").encode("utf-8"))
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    failures = 0
+                    sys.stdout.write(line.decode("utf-8"))
+                    sys.stdout.flush()
+        except BrokenPipeError:
+            # Our reader went away
+            return 0
+        except OSError:
+            pass
+        finally:
+            sock.close()
+        # Daemon went away (idle exit race or crash), reconnect
+        failures += 1
+        time.sleep(0.1)
+
+    # Fall back to sampling in-process
+    return run_standalone(interval_ms, metrics, disks, options)
+
+
+class FixtureRecorder:
+    """
+    Snapshots the /proc and /sys files the collectors read into a fixture.
+
+    Each frame is a full tree under <dir>/frames/<n>, taken `interval`
+    seconds apart so the replayer can derive counter rates. Facts that
+    aren't files (device symlinks, statvfs, nvidia-smi output) go into a
+    .fixture.json next to the tree.
+    """
+
+    PATTERNS = [
+        "/proc/stat",
+        "/proc/meminfo",
+        "/proc/cpuinfo",
+        "/proc/mounts",
+        "/proc/diskstats",
+        "/proc/net/dev",
+        "/proc/[0-9]*/stat",
+        "/proc/driver/nvidia/gpus/*/information",
+        "/sys/class/hwmon/*/name",
+        "/sys/class/hwmon/*/temp*_input",
+        "/sys/class/drm/card*/gt_act_freq_mhz",
+        "/sys/class/drm/card*/device/vendor",
+        "/sys/class/drm/card*/device/gpu_busy_percent",
+        "/sys/class/drm/card*/device/mem_info_vram_*",
+        "/sys/class/drm/card*/device/tile0/gt0/freq0/act_freq",
+        "/sys/class/drm/card*/device/hwmon/*/temp1_input",
+        "/sys/class/drm/card*/device/hwmon/*/power1_*",
+        "/sys/class/drm/card*/device/hwmon/*/freq*_input",
+        "/sys/class/drm/card*/device/hwmon/*/energy1_input",
+        "/sys/block/*/queue/rotational",
+        "/sys/class/powercap/intel-rapl:*/name",
+        "/sys/class/powercap/intel-rapl:*/max_energy_range_uj",
+        "/sys/class/powercap/intel-rapl:*/energy_uj",
+        "/sys/class/power_supply/*/type",
+        "/sys/class/power_supply/*/scope",
+        "/sys/class/power_supply/*/power_now",
+        "/sys/class/power_supply/*/current_now",
+        "/sys/class/power_supply/*/voltage_now",
+        "/sys/class/power_supply/*/status",
+        "/sys/class/power_supply/*/capacity",
+        "/sys/class/thermal/thermal_zone*/type",
+        "/sys/class/thermal/thermal_zone*/temp",
+    ]
+
+    def __init__(self, fixture_dir, disks):
+        self.fixture_dir = fixture_dir
+        self.disks = disks
+
+    def _meta(self, monitor):
+        meta = {"devices": {}, "pci_slots": {}, "statvfs": {}, "nvidia_smi": {}}
+        try:
+            with open("/proc/mounts", "r") as f:
+                for line in f:
+                    dev = line.split()[0]
+                    if dev.startswith("/dev/"):
+                        meta["devices"][dev] = monitor._resolve_device(dev)
+        except OSError:
+            pass
+        for card in glob.glob("/sys/class/drm/card*/device"):
+            card = card.split("/")[4]
+            meta["pci_slots"][card] = monitor._pci_slot(card)
+        for mount in self.disks:
+            try:
+                meta["statvfs"][mount] = list(monitor._statvfs(mount))
+            except OSError:
+                pass
+        for gpu in monitor.gpu_info:
+            if gpu["vendor"] == "nvidia":
+                try:
+                    meta["nvidia_smi"][gpu["pci_id"]] = monitor._nvidia_query(
+                        gpu["pci_id"]
+                    )
+                except (OSError, subprocess.CalledProcessError):
+                    pass
+        return meta
+
+    def _paths(self, monitor):
+        paths = []
+        for pattern in self.PATTERNS:
+            paths.extend(glob.glob(pattern))
+        for gpu in monitor.gpu_info:
+            if gpu.get("power_path"):
+                paths.append(gpu["power_path"])
+        return paths
+
+    def record_frame(self, frame_dir, monitor):
+        count = 0
+        for path in self._paths(monitor):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                # Racing process exits, root-only counters
+                continue
+            target = rooted(frame_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            count += 1
+        with open(os.path.join(frame_dir, FIXTURE_META), "w") as f:
+            json.dump(self._meta(monitor), f, indent=2)
+        return count
+
+    def record(self, frames, interval):
+        monitor = SystemMonitor(self.disks)
+        next_frame = time.monotonic()
+        for n in range(frames):
+            frame_dir = os.path.join(self.fixture_dir, "frames", str(n))
+            os.makedirs(frame_dir, exist_ok=True)
+            count = self.record_frame(frame_dir, monitor)
+            print(f"✓ Frame {n}: {count} files", file=sys.stderr)
+            next_frame += interval
+            if n + 1 < frames:
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+        with open(os.path.join(self.fixture_dir, "recording.json"), "w") as f:
+            json.dump({"frames": frames, "interval": interval}, f)
+        return 0
+
+
+class FixtureReplayer:
+    """
+    Plays a FixtureRecorder recording back into a working tree.
+
+    Recorded frames are written in order. After the last one, numbers in
+    counter files that only grew during the recording (jiffies, sectors,
+    bytes, energy) keep growing at their average recorded rate, energy_uj
+    wrapping at its max_energy_range_uj, while everything else repeats the
+    last frame.
+    Files are rewritten in place so collectors' cached fds see new values.
+    """
 
-    monitor = SystemMonitor(disks)
+    NUMBER = re.compile(rb"(\d+)")
+    # Files holding cumulative counters; gauges like MemAvailable never extrapolate
+    COUNTERS = re.compile(
+        r"^proc/(stat|diskstats|net/dev|\d+/stat)$|(energy_uj|energy1_input)$"
+    )
+
+    def __init__(self, fixture_dir, work_dir):
+        self.work_dir = work_dir
+        frames_root = os.path.join(fixture_dir, "frames")
+        frame_dirs = [
+            os.path.join(frames_root, name)
+            for name in sorted(os.listdir(frames_root), key=int)
+        ]
+        self.files = {}
+        for dirpath, _, filenames in os.walk(frame_dirs[0]):
+            for filename in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, filename), frame_dirs[0])
+                contents = []
+                for frame_dir in frame_dirs:
+                    try:
+                        with open(os.path.join(frame_dir, rel), "rb") as f:
+                            contents.append(f.read())
+                    except OSError:
+                        # Gone in this frame (exited process), hold it steady
+                        contents.append(contents[-1])
+                self.files[rel] = contents
+        self.tracks = {
+            rel: self._track(contents) if self.COUNTERS.search(rel) else None
+            for rel, contents in self.files.items()
+        }
+        self.current = {}
+        self.step = 0
+
+    def _track(self, contents):
+        """Split the last frame into text and counters with their rates."""
+        frames = [self.NUMBER.split(c) for c in contents]
+        if len(frames) < 2 or any(len(f) != len(frames[0]) for f in frames):
+            return None
+        rates = {}
+        for i in range(1, len(frames[0]), 2):
+            values = [int(f[i]) for f in frames]
+            grows = all(b >= a for a, b in zip(values, values[1:]))
+            if grows and values[-1] > values[0]:
+                rates[i] = (values[-1] - values[0]) / (len(values) - 1)
+        return (frames[-1], rates) if rates else None
+
+    def content(self, rel, step):
+        contents = self.files[rel]
+        if step < len(contents):
+            return contents[step]
+        track = self.tracks[rel]
+        if track is None:
+            return contents[-1]
+        parts, rates = track
+        extra = step - (len(contents) - 1)
+        parts = list(parts)
+        wrap = 0
+        if rel.endswith("energy_uj"):
+            max_range = self.files.get(
+                os.path.join(os.path.dirname(rel), "max_energy_range_uj")
+            )
+            if max_range:
+                wrap = int(max_range[-1].strip() or 0)
+        for i, rate in rates.items():
+            value = int(parts[i]) + int(rate * extra)
+            if wrap:
+                value %= wrap
+            parts[i] = str(value).encode()
+        return b"".join(parts)
+
+    def advance(self):
+        for rel in self.files:
+            data = self.content(rel, self.step)
+            if self.current.get(rel) == data:
+                continue
+            path = os.path.join(self.work_dir, rel)
+            if rel not in self.current:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Truncate and rewrite the same inode
+            with open(path, "wb") as f:
+                f.write(data)
+            self.current[rel] = data
+        self.step += 1
+
+
+def open_root(root):
+    """
+    Resolve --root: a recording is replayed into a scratch tree, anything
+    else is used as a static tree. Returns (root, replayer or None).
+    """
+    if not os.path.isdir(os.path.join(root, "frames")):
+        return root, None
+    work_dir = tempfile.mkdtemp(prefix="ambxst-monitor-replay-")
+    replayer = FixtureReplayer(root, work_dir)
+    replayer.advance()
+    return work_dir, replayer
+
+
+def create_sampler(disks, tick, options, root="/"):
+    monitor = SystemMonitor(disks, options.top, options.proc_budget / 1000.0, root)
+    return Sampler(
+        monitor, tick, dict(options.rate), not options.no_backoff, options.profile
+    )
+
+
+def run_benchmark(iterations, metrics, disks, options, root="/", replayer=None):
+    """Call each collector back to back and report its per-call cost."""
+    sampler = create_sampler(disks, 0.1, options, root)
+    sampler.set_disks(disks)
+    names = [n for m in metrics for n in METRIC_COLLECTORS[m]]
+
+    report = {"iterations": iterations, "root": root, "collectors": {}}
+    for name in names:
+        fn = sampler.collectors[name].fn
+        # Prime delta baselines and cached fds
+        fn()
+        walls = []
+        cpu_ns = 0
+        for _ in range(iterations):
+            if replayer is not None:
+                # Untimed: move the fixture's counters forward
+                replayer.advance()
+            wall = time.perf_counter_ns()
+            cpu = time.thread_time_ns()
+            fn()
+            cpu_ns += time.thread_time_ns() - cpu
+            walls.append(time.perf_counter_ns() - wall)
+        walls.sort()
+        report["collectors"][name] = {
+            "wall_us_mean": sum(walls) / iterations / 1000.0,
+            "wall_us_p50": walls[iterations // 2] / 1000.0,
+            "wall_us_p95": walls[min(iterations - 1, iterations * 95 // 100)] / 1000.0,
+            "cpu_us_mean": cpu_ns / iterations / 1000.0,
+        }
+    report["self"] = SelfUsage().report()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_standalone(interval_ms, metrics, disks, options, root="/", replayer=None):
     interval_sec = max(0.1, interval_ms / 1000.0)
+    sampler = create_sampler(disks, interval_sec, options, root)
+    sampler.set_disks(disks)
+    monitor = sampler.monitor
 
-    print(
-        json.dumps(
-            {
-                "static": {
-                    "cpu_model": monitor.cpu_model,
-                    "gpu_names": [g["name"] for g in monitor.gpu_info],
-                    "gpu_vendors": [g["vendor"] for g in monitor.gpu_info],
-                    "disk_types": monitor.disk_types,
-                    "gpu_count": len(monitor.gpu_info),
-                }
-            }
-        ),
-        flush=True,
+    print(json.dumps(monitor.get_static(disks)), flush=True)
+
+    next_tick = time.monotonic()
+    while True:
+        if replayer is not None:
+            replayer.advance()
+        print(json.dumps(sampler.collect(metrics)), flush=True)
+        # Sleep to the next deadline so sampling time doesn't add drift
+        next_tick += interval_sec
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Fell behind, skip the missed ticks
+            next_tick = time.monotonic()
+
+
+def main():
+    # Syntax: system_monitor.py [--client|--daemon] [interval_ms] [disk1] [disk2] ...
+    parser = argparse.ArgumentParser(description="Ambxst system monitor")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon", action="store_true", help="serve samples over a Unix socket"
+    )
+    mode.add_argument(
+        "--client", action="store_true", help="subscribe to the shared daemon"
+    )
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument(
+        "--metrics",
+        help="comma-separated metric groups to report (%s); defaults to %s"
+        % (", ".join(METRIC_COLLECTORS), ",".join(DEFAULT_METRICS)),
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=10.0,
+        help="seconds the daemon lingers without clients",
+    )
+    parser.add_argument(
+        "--rate",
+        type=parse_rate,
+        action="append",
+        default=[],
+        metavar="NAME=MS",
+        help="base period for a collector (%s)" % ", ".join(COLLECTOR_DEFAULTS),
+    )
+    parser.add_argument(
+        "--no-backoff",
+        action="store_true",
+        help="keep collectors at their base period even when values are stable",
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="processes listed by the procs group"
+    )
+    parser.add_argument(
+        "--proc-budget",
+        type=float,
+        default=10.0,
+        help="CPU ms the procs collector may spend per tick",
+    )
+    parser.add_argument(
+        "--profile",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help='report per-collector and self overhead in a "self" block every '
+        "SECONDS (e.g. 10)",
+    )
+    mode.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="run each collector of --metrics N times and report timings",
+    )
+    parser.add_argument(
+        "--root",
+        help="read /proc and /sys from this fixture tree or recording instead",
     )
+    mode.add_argument(
+        "--record",
+        metavar="DIR",
+        help="record a fixture of this machine into DIR (frames taken interval_ms apart)",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=3, help="frames captured by --record"
+    )
+    parser.add_argument("args", nargs="*", metavar="[interval_ms] disk")
+    options = parser.parse_args()
 
+    interval_ms = 2000
+    disks = ["/"]
+    if options.args:
+        try:
+            interval_ms = int(options.args[0])
+            disks = options.args[1:] or ["/"]
+        except ValueError:
+            disks = options.args
+
+    root, replayer = "/", None
     try:
-        while True:
-            cpu_usage = monitor.get_cpu()
-            cpu_temp = monitor.get_cpu_temp()
-            ram_usage, ram_total, ram_used, ram_avail = monitor.get_mem()
-            disk_usage = monitor.get_disk_usage(disks)
-            gpu_usages, gpu_temps = monitor.get_gpu_stats()
-
-            print(
-                json.dumps(
-                    {
-                        "cpu": {"usage": cpu_usage, "temp": cpu_temp},
-                        "ram": {
-                            "usage": ram_usage,
-                            "total": ram_total,
-                            "used": ram_used,
-                            "available": ram_avail,
-                        },
-                        "disk": {"usage": disk_usage},
-                        "gpu": {
-                            "detected": len(monitor.gpu_info) > 0,
-                            "count": len(monitor.gpu_info),
-                            "usages": gpu_usages,
-                            "temps": gpu_temps,
-                        },
-                    }
-                ),
-                flush=True,
+        if options.daemon:
+            return MonitorDaemon(options).serve()
+        if options.record:
+            recorder = FixtureRecorder(options.record, disks)
+            return recorder.record(max(2, options.frames), interval_ms / 1000.0)
+        if options.root:
+            root, replayer = open_root(options.root)
+        if options.benchmark:
+            # Every group unless narrowed down explicitly
+            metrics = parse_metrics(options.metrics, METRIC_COLLECTORS)
+            return run_benchmark(
+                max(1, options.benchmark), metrics, disks, options, root, replayer
             )
-            time.sleep(interval_sec)
+        metrics = parse_metrics(options.metrics)
+        if options.client:
+            return run_client(interval_ms, metrics, disks, options)
+        return run_standalone(interval_ms, metrics, disks, options, root, replayer)
     except KeyboardInterrupt:
-        sys.exit(0)
+        return 0
+    finally:
+        if replayer is not None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+from frameselect import select_frame_time
+
 # Supported extensions
 VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".avi", ".mkv"}
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp"}
@@ -156,14 +158,19 @@ class ThumbnailGenerator:
             # Ensure parent directory exists
             thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
 
+            # Seek to the most representative keyframe (cached per video)
+            start = select_frame_time(video_path, self.cache_base_path)
+            if start is not None:
+                seek = ["-ss", f"{start:.3f}", "-i", str(video_path)]
+            else:
+                # Skip first second to avoid black frames
+                seek = ["-i", str(video_path), "-ss", "00:00:01"]
+
             # FFmpeg command for high-quality thumbnail
             cmd = [
                 "ffmpeg",
                 "-y",
-                "-i",
-                str(video_path),
-                "-ss",
-                "00:00:01",  # Skip first second to avoid black frames
+                *seek,
                 "-vframes",
                 "1",  # Extract only 1 frame
                 "-vf",
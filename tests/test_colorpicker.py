@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+import colorpicker
+
+
+@pytest.mark.parametrize("runs", ["0", "-1"])
+def test_benchmark_needs_a_run(monkeypatch, runs):
+    monkeypatch.setattr(sys, "argv", ["colorpicker.py", "--benchmark", runs])
+    with pytest.raises(SystemExit) as exit_info:
+        colorpicker.main()
+    assert exit_info.value.code == 2
+
+
+def test_checks_agree(tmp_path, monkeypatch):
+    for dep in colorpicker.DEPENDENCIES[1:]:
+        stub = tmp_path / dep
+        stub.write_text("#!/bin/sh\n")
+        stub.chmod(0o755)
+    # Only the stubs and `which` itself are on PATH
+    which_dir = os.path.dirname(shutil.which("which"))
+    monkeypatch.setenv("PATH", f"{tmp_path}:{which_dir}")
+    monkeypatch.setattr(colorpicker, "DEPS_STATE", tmp_path / "deps.json")
+
+    missing = [colorpicker.DEPENDENCIES[0]]
+    assert colorpicker.missing_dependencies() == missing
+    assert colorpicker.legacy_missing_dependencies() == missing
+
+
+def test_swatch_written_through_a_private_temporary(tmp_path, monkeypatch):
+    monkeypatch.setattr(colorpicker, "SWATCH_DIR", tmp_path)
+    # A leftover from another picker's shared temporary must not be used
+    (tmp_path / "FF8000.tmp").write_bytes(b"half-written")
+    path = colorpicker.swatch_path((255, 128, 0))
+    assert path == tmp_path / "FF8000.png"
+    assert path.read_bytes() == colorpicker.swatch_png((255, 128, 0))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["FF8000.png", "FF8000.tmp"]
@@ -0,0 +1,72 @@
+import json
+
+import frameselect
+
+SIZE = frameselect.SAMPLE_SIZE * frameselect.SAMPLE_SIZE
+BLACK = bytes(SIZE)
+WHITE = bytes([255]) * SIZE
+# Every mid-range grey level equally often: high entropy, good exposure
+TEXTURED = bytes(64 + i % 128 for i in range(SIZE))
+FLAT_GREY = bytes([128]) * SIZE
+
+
+def test_black_and_blown_out_frames_score_zero():
+    assert frameselect.score_frame(BLACK) == 0.0
+    assert frameselect.score_frame(WHITE) == 0.0
+    assert frameselect.score_frame(b"") == 0.0
+
+
+def test_textured_frame_beats_flat_and_dark_ones():
+    textured = frameselect.score_frame(TEXTURED)
+    assert textured == 7.0  # log2(128) levels, fully exposed
+    assert frameselect.score_frame(FLAT_GREY) == 0.0
+    dim = bytes(value // 4 for value in TEXTURED)
+    assert 0 < frameselect.score_frame(dim) < textured
+
+
+def test_choose_frame_time_skips_fade_in():
+    samples = [(0.0, BLACK), (1.5, FLAT_GREY), (3.0, TEXTURED), (6.0, WHITE)]
+    assert frameselect.choose_frame_time(samples) == 3.0
+
+
+def test_choose_frame_time_prefers_earliest_within_tolerance():
+    # Slightly worse than the best, but within SCORE_TOLERANCE and earlier
+    nearly = bytes(64 + i % 120 for i in range(SIZE))
+    assert (
+        frameselect.score_frame(nearly)
+        >= frameselect.score_frame(TEXTURED) * frameselect.SCORE_TOLERANCE
+    )
+    samples = [(0.0, BLACK), (2.0, nearly), (4.0, TEXTURED)]
+    assert frameselect.choose_frame_time(samples) == 2.0
+    assert frameselect.choose_frame_time([(-0.04, TEXTURED)]) == 0.0
+    assert frameselect.choose_frame_time([]) is None
+
+
+def test_negative_result_is_cached(tmp_path, monkeypatch):
+    calls = []
+
+    def no_keyframes(source):
+        calls.append(source)
+        return []
+
+    monkeypatch.setattr(frameselect, "sample_keyframes", no_keyframes)
+    video = tmp_path / "broken.mp4"
+    video.write_bytes(b"not a video")
+
+    assert frameselect.select_frame_time(video, tmp_path) is None
+    assert frameselect.select_frame_time(video, tmp_path) is None
+    assert len(calls) == 1
+    entries = json.loads((tmp_path / frameselect.CACHE_FILE).read_text())
+    assert [entry["time"] for entry in entries.values()] == [None]
+
+
+def test_failed_sampling_is_not_cached(tmp_path, monkeypatch):
+    def missing_ffmpeg(source):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(frameselect, "sample_keyframes", missing_ffmpeg)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"video")
+
+    assert frameselect.select_frame_time(video, tmp_path) is None
+    assert not (tmp_path / frameselect.CACHE_FILE).exists()
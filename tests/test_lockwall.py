@@ -0,0 +1,104 @@
+import hashlib
+import os
+import time
+
+import lockwall
+
+
+def fake_extract(self, outputs, variants):
+    # Stands in for ffmpeg: each frame records which source it came from
+    for path in outputs.values():
+        path.write_text(str(self.current_wallpaper))
+    return True, "Success"
+
+
+def test_published_name_is_md5_of_absolute_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    digest = hashlib.md5(str(tmp_path / "clip.mp4").encode()).hexdigest()
+    assert lockwall.published_name("clip.mp4") == digest + ".jpg"
+    assert lockwall.published_name(tmp_path / "clip.mp4", ".1920x1080") == (
+        digest + ".1920x1080.jpg"
+    )
+
+
+def test_batch_keeps_same_named_wallpapers_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        lockwall.LockscreenWallpaperGenerator, "extract_frames", fake_extract
+    )
+    monkeypatch.setattr(lockwall, "lower_priority", lambda: None)
+    walls = tmp_path / "walls"
+    sources = [walls / "day" / "loop.mp4", walls / "night" / "loop.mp4"]
+    for source in sources:
+        source.parent.mkdir(parents=True)
+        source.write_bytes(source.parent.name.encode())
+
+    data = tmp_path / "cache"
+    assert lockwall.run_batch(walls, str(data), [(640, 360)], 8, 4, 16) == 0
+
+    for source in sources:
+        for variant in ("", ".640x360", ".640x360.blur8"):
+            published = data / "lockscreen" / lockwall.published_name(source, variant)
+            assert published.read_text() == str(source)
+    leftovers = [p for p in (data / "lockscreen").rglob(".*") if p.name != ".lock"]
+    assert leftovers == []
+
+
+def test_old_published_names_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        lockwall.LockscreenWallpaperGenerator, "extract_frames", fake_extract
+    )
+    source = tmp_path / "loop.mp4"
+    source.write_bytes(b"video")
+    generator = lockwall.LockscreenWallpaperGenerator(
+        str(source), str(tmp_path / "cache"), verbose=False
+    )
+    assert generator.validate_wallpaper()
+    key = generator.cache.source_key(source)
+    with generator.cache.locked() as entries:
+        entries[key] = {"variants": [], "published": ["loop.mp4.jpg"]}
+    legacy = generator.lockscreen_dir / "loop.mp4.jpg"
+    legacy.write_text("old")
+
+    assert generator.generate_frame() == (True, "Success")
+    assert not legacy.exists()
+    assert sorted(os.listdir(generator.lockscreen_dir)) == sorted(
+        [".lock", "frames", "index.json", lockwall.published_name(source)]
+    )
+
+
+def test_store_elsewhere_keeps_frames_of_a_render_in_progress(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    first.write_bytes(b"a")
+    second.write_bytes(b"b")
+    other = lockwall.LockscreenWallpaperGenerator(str(second), cache_dir)
+    assert other.validate_wallpaper()
+
+    def extract_then_interleave(self, outputs, variants):
+        fake_extract(self, outputs, variants)
+        if self is not other:
+            # Another worker stores (and prunes) before this one re-locks
+            assert other.generate_frame() == (True, "Success")
+        return True, "Success"
+
+    monkeypatch.setattr(
+        lockwall.LockscreenWallpaperGenerator, "extract_frames", extract_then_interleave
+    )
+    generator = lockwall.LockscreenWallpaperGenerator(str(first), cache_dir)
+    assert generator.validate_wallpaper()
+    assert generator.generate_frame() == (True, "Success")
+    published = generator.lockscreen_dir / lockwall.published_name(first)
+    assert published.read_text() == str(first)
+
+
+def test_orphan_frames_pruned_after_grace(tmp_path):
+    cache = lockwall.FrameCache(tmp_path)
+    old, fresh = cache.frame_path("0" * 24), cache.frame_path("1" * 24, ".640x360")
+    for path in (old, fresh):
+        path.write_text("frame")
+    stale = time.time() - lockwall.FRAME_GRACE - 1
+    os.utime(old, (stale, stale))
+
+    cache.prune({})
+    assert not old.exists()
+    assert fresh.exists()
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+
+import pytest
+
+import system_monitor
+
+PCI_SLOT = "0000:00:02.0"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(system_monitor.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def root(tmp_path):
+    """A fixture tree with one Intel card and no DRM clients yet."""
+    device = tmp_path / "sys/class/drm/card0/device"
+    device.mkdir(parents=True)
+    (device / "vendor").write_text("0x8086\n")
+    (tmp_path / "proc").mkdir()
+    (tmp_path / system_monitor.FIXTURE_META).write_text(
+        json.dumps({"pci_slots": {"card0": PCI_SLOT}})
+    )
+    return tmp_path
+
+
+def add_client(root, pid, fd, counters, client_id=1, pdev=PCI_SLOT):
+    """Open a fake /dev/dri fd in pid with the given fdinfo counter lines."""
+    (root / f"proc/{pid}/fd").mkdir(parents=True, exist_ok=True)
+    (root / f"proc/{pid}/fdinfo").mkdir(exist_ok=True)
+    link = root / f"proc/{pid}/fd/{fd}"
+    if not os.path.lexists(link):
+        os.symlink("/dev/dri/renderD128", link)
+    lines = [f"drm-pdev:\t{pdev}", f"drm-client-id:\t{client_id}"] + counters
+    (root / f"proc/{pid}/fdinfo/{fd}").write_text("\n".join(lines) + "\n")
+
+
+def intel_busy(root):
+    monitor = system_monitor.SystemMonitor(root=str(root))
+    (gpu,) = monitor.gpu_info
+    assert gpu["vendor"] == "intel"
+    assert isinstance(gpu["busy"], system_monitor.DrmFdinfoBusy)
+    return gpu["busy"]
+
+
+def test_i915_engine_ns(root, clock):
+    add_client(root, 100, 5, ["drm-engine-render:\t0 ns", "drm-engine-video:\t0 ns"])
+    busy = intel_busy(root)
+    assert busy.read() == 0.0
+
+    clock.now += 1.0
+    add_client(
+        root,
+        100,
+        5,
+        ["drm-engine-render:\t500000000 ns", "drm-engine-video:\t100000000 ns"],
+    )
+    assert busy.read() == pytest.approx(50.0)
+
+
+def test_xe_cycles(root, clock):
+    add_client(root, 100, 5, ["drm-cycles-rcs:\t0", "drm-total-cycles-rcs:\t1000"])
+    busy = intel_busy(root)
+    busy.read()
+
+    clock.now += 1.0
+    add_client(root, 100, 5, ["drm-cycles-rcs:\t250", "drm-total-cycles-rcs:\t2000"])
+    assert busy.read() == pytest.approx(25.0)
+
+
+def test_clients_summed_and_deduplicated(root, clock):
+    add_client(root, 100, 5, ["drm-engine-render:\t0 ns"], client_id=1)
+    # Same client through a dup'd fd in another process
+    add_client(root, 101, 7, ["drm-engine-render:\t0 ns"], client_id=1)
+    add_client(root, 102, 3, ["drm-engine-render:\t0 ns"], client_id=2)
+    # A different GPU is ignored
+    add_client(root, 103, 4, ["drm-engine-render:\t0 ns"], client_id=3, pdev="x")
+    busy = intel_busy(root)
+    busy.read()
+
+    clock.now += 1.0
+    add_client(root, 100, 5, ["drm-engine-render:\t200000000 ns"], client_id=1)
+    add_client(root, 101, 7, ["drm-engine-render:\t200000000 ns"], client_id=1)
+    add_client(root, 102, 3, ["drm-engine-render:\t300000000 ns"], client_id=2)
+    add_client(
+        root, 103, 4, ["drm-engine-render:\t900000000 ns"], client_id=3, pdev="x"
+    )
+    assert busy.read() == pytest.approx(50.0)
+
+
+def test_usage_capped(root, clock):
+    add_client(root, 100, 5, ["drm-engine-render:\t0 ns"])
+    busy = intel_busy(root)
+    busy.read()
+    clock.now += 1.0
+    add_client(root, 100, 5, ["drm-engine-render:\t3000000000 ns"])
+    assert busy.read() == 100.0
+
+
+def test_pids_rescanned_every_n_ticks(root, clock, monkeypatch):
+    add_client(root, 100, 5, ["drm-engine-render:\t0 ns"])
+    busy = intel_busy(root)
+    scans = []
+    scan = busy._scan
+    monkeypatch.setattr(busy, "_scan", lambda: scans.append(1) or scan())
+
+    busy.read()
+    add_client(root, 200, 5, ["drm-engine-render:\t0 ns"], client_id=2)
+    for _ in range(busy.RESCAN_TICKS - 1):
+        clock.now += 1.0
+        busy.read()
+        assert "2" not in busy.prev
+    assert len(scans) == 1
+
+    clock.now += 1.0
+    busy.read()
+    assert len(scans) == 2
+    assert "2" in busy.prev
+
+
+def test_exited_client_dropped(root, clock):
+    add_client(root, 100, 5, ["drm-engine-render:\t0 ns"])
+    busy = intel_busy(root)
+    busy.read()
+    (root / "proc/100/fdinfo/5").unlink()
+    clock.now += 1.0
+    assert busy.read() == 0.0
+    assert busy.fdinfo_paths == []
+
+
+def test_daemon_args_forwarded():
+    options = argparse.Namespace(
+        rate=[system_monitor.parse_rate("gpu=500")], no_backoff=True, profile=10.0
+    )
+    assert system_monitor.daemon_args(options) == [
+        "--rate",
+        "gpu=500",
+        "--no-backoff",
+        "--profile",
+        "10",
+    ]
+
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def amd_root(tmp_path):
+    """A fixture tree with one AMD card whose hwmon only has power1_input."""
+    device = tmp_path / "sys/class/drm/card1/device"
+    hwmon = device / "hwmon/hwmon3"
+    hwmon.mkdir(parents=True)
+    values = {
+        device / "vendor": "0x1002",
+        device / "gpu_busy_percent": 42,
+        device / "mem_info_vram_used": 512 * MIB + 123,
+        device / "mem_info_vram_total": 8192 * MIB,
+        hwmon / "temp1_input": 61500,
+        hwmon / "power1_input": 35250000,
+        hwmon / "freq1_input": 1850000000,
+        hwmon / "freq2_input": 1000000000,
+    }
+    for path, value in values.items():
+        path.write_text(f"{value}\n")
+    return tmp_path
+
+
+def amd_stats(monitor):
+    return {field: values[0] for field, values in monitor.get_gpu_stats().items()}
+
+
+def test_amd_stats(amd_root):
+    monitor = system_monitor.SystemMonitor(root=str(amd_root))
+    (gpu,) = monitor.gpu_info
+    assert gpu["vendor"] == "amd"
+    assert amd_stats(monitor) == {
+        "usages": 42.0,
+        "temps": 61,
+        "vram_used": 512,
+        "vram_total": 8192,
+        "power": pytest.approx(35.25),
+        "core_clock": 1850,
+        "mem_clock": 1000,
+    }
+
+
+def test_amd_power_average_preferred(amd_root):
+    hwmon = amd_root / "sys/class/drm/card1/device/hwmon/hwmon3"
+    (hwmon / "power1_average").write_text("20000000\n")
+    monitor = system_monitor.SystemMonitor(root=str(amd_root))
+    assert amd_stats(monitor)["power"] == pytest.approx(20.0)
+
+
+def test_amd_missing_files_use_defaults(amd_root):
+    device = amd_root / "sys/class/drm/card1/device"
+    for name in ("mem_info_vram_total", "hwmon/hwmon3/freq2_input"):
+        (device / name).unlink()
+    stats = amd_stats(system_monitor.SystemMonitor(root=str(amd_root)))
+    assert stats["vram_total"] == -1
+    assert stats["mem_clock"] == -1
+    assert stats["core_clock"] == 1850
+
+
+def test_amd_files_resolved_once(amd_root, monkeypatch):
+    monitor = system_monitor.SystemMonitor(root=str(amd_root))
+    lookups = []
+    monkeypatch.setattr(
+        system_monitor.SystemMonitor,
+        "_first_hwmon",
+        staticmethod(lambda device: lookups.append(device)),
+    )
+    amd_stats(monitor)
+    # Values change in place; the kept-open files see them without a re-resolve
+    device = amd_root / "sys/class/drm/card1/device"
+    (device / "gpu_busy_percent").write_text("7\n")
+    (device / "hwmon/hwmon3/temp1_input").write_text("70000\n")
+    stats = amd_stats(monitor)
+    assert (stats["usages"], stats["temps"]) == (7.0, 70)
+    assert lookups == []